@@ -1,47 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import cast, String, or_
-from typing import Optional
+from sqlalchemy import update, delete
+from typing import List, Optional
+from pydantic import TypeAdapter
+import asyncio
 import logging
 
-from app.db.database import get_db
-from app.db.models import MediaItem, MediaStatus, MediaType
+from app.db.database import get_db, AsyncSessionLocal
+from app.db.models import MediaItem, MediaType, genre_keys
+from app.core.config import flatten_csv
 from app.core.exceptions import ItemNotFoundError, ExternalApiError
 from app.schemas import (
     MediaItemResponse,
+    MediaItemListResponse,
     MediaItemUpdate,
     SyncRequest,
     ListResponseModel,
     ResponseModel,
     MetaData,
 )
-from app.services.metadata import MetadataService
-from app.services.db import get_filtered_items  # Import shared logic
+from app.services.metadata import MetadataService, get_metadata_service
+from app.services.db import (  # Import shared logic
+    get_filtered_items,
+    get_library_fingerprint,
+)
+from app.core.http import REVALIDATE_CACHE_CONTROL, make_etag, not_modified_response
+from app.api.stremio import invalidate_catalog_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+def _identity(value):
+    return value
+
+
+def _optional_str(value):
+    return str(value) if value else None
+
+
+# Column-specific conversions applied to MediaItemUpdate fields before writing
+_COERCERS = {
+    "poster_url": _optional_str,
+    "backdrop_url": _optional_str,
+    "binged_url": _optional_str,
+    "media_type": lambda v: v.value,
+    "status": lambda v: v.value,
+}
+
+# Columns selected for compact listings (matches MediaItemListResponse)
+LIST_COLUMNS = (
+    MediaItem.id,
+    MediaItem.title,
+    MediaItem.year,
+    MediaItem.media_type,
+    MediaItem.status,
+    MediaItem.poster_url,
+    MediaItem.language,
+    MediaItem.platform,
+    MediaItem.tmdb_id,
+    MediaItem.imdb_id,
+    MediaItem.genres,
+    MediaItem.binged_url,
+    MediaItem.streaming_date,
+    MediaItem.created_at,
+    MediaItem.updated_at,
+)
+
+# Whole-page adapters: one compiled core schema per response shape, validated from
+# ORM rows in a single call and serialized straight to JSON bytes by pydantic-core
+ITEM_PAGE_ADAPTER = TypeAdapter(ListResponseModel[MediaItemResponse])
+COMPACT_PAGE_ADAPTER = TypeAdapter(ListResponseModel[MediaItemListResponse])
+
 # --- Media Items (Read) ---
 
 
 @router.get("/items", response_model=ListResponseModel[MediaItemResponse])
 async def list_items(
+    request: Request,
     skip: int = 0,
     limit: int = 50,
-    status: Optional[str] = None,
-    media_type: Optional[str] = None,
-    language: Optional[str] = None,
-    platform: Optional[str] = None,
-    genres: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    media_type: Optional[List[str]] = Query(None),
+    language: Optional[List[str]] = Query(None),
+    platform: Optional[List[str]] = Query(None),
+    genres: Optional[List[str]] = Query(None),
     q: Optional[str] = None,
+    include_total: bool = False,
+    compact: bool = False,
     db: AsyncSession = Depends(get_db),
 ):
-    """List all media items with filtering and search."""
+    """
+    List all media items with filtering and search.
+    The total count is only computed when explicitly requested via include_total.
+    With compact=1, heavy columns (overview, backdrop) are neither loaded nor returned.
+    Filters can be repeated (?status=a&status=b) or comma-separated (?status=a,b).
+    Supports conditional requests via ETag / If-None-Match.
+    """
+    status = flatten_csv(status)
+    media_type = flatten_csv(media_type)
+    language = flatten_csv(language)
+    platform = flatten_csv(platform)
+    genres = flatten_csv(genres)
+
+    fingerprint = await get_library_fingerprint(db)
+    etag = make_etag(
+        fingerprint,
+        skip,
+        limit,
+        status,
+        media_type,
+        language,
+        platform,
+        genres,
+        q,
+        include_total,
+        compact,
+    )
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
 
     # Delegate to shared service
-    items, total = await get_filtered_items(
+    items, total, has_more = await get_filtered_items(
         db=db,
         skip=skip,
         limit=limit,
@@ -51,26 +135,32 @@ async def list_items(
         platform=platform,
         genres=genres,
         q=q,
+        include_total=include_total,
+        columns=LIST_COLUMNS if compact else None,
     )
 
-    logger.info(f"API: Returning {len(items)} items (skip={skip}, limit={limit})")
+    logger.info("API: Returning %s items (skip=%s, limit=%s)", len(items), skip, limit)
 
-    return ListResponseModel(
-        data=items, meta=MetaData(total=total, limit=limit, skip=skip)
+    # Serialize directly to bytes, skipping the response_model re-validation pass
+    adapter = COMPACT_PAGE_ADAPTER if compact else ITEM_PAGE_ADAPTER
+    meta = MetaData(total=total, limit=limit, skip=skip, has_more=has_more)
+    page = adapter.validate_python({"data": items, "meta": meta}, from_attributes=True)
+    return Response(
+        adapter.dump_json(page),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL},
     )
 
 
 @router.get("/items/{item_id}", response_model=ResponseModel[MediaItemResponse])
 async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """Get a single media item by ID."""
-    logger.debug(f"Fetching item with ID: {item_id}")
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
-    result = await db.execute(stmt)
-    item = result.scalar_one_or_none()
+    logger.debug("Fetching item with ID: %s", item_id)
+    item = await db.get(MediaItem, item_id)
     if not item:
-        logger.warning(f"Item with ID {item_id} not found")
+        logger.warning("Item with ID %s not found", item_id)
         raise ItemNotFoundError(item_id)
-    logger.info(f"Successfully retrieved item: {item.title} (ID: {item_id})")
+    logger.info("Successfully retrieved item: %s (ID: %s)", item.title, item_id)
     return ResponseModel(data=item)
 
 
@@ -82,124 +172,197 @@ async def update_item(
     item_id: int, update_data: MediaItemUpdate, db: AsyncSession = Depends(get_db)
 ):
     """Update details of a media item."""
-    logger.debug(
-        f"Updating item {item_id} with data: {update_data.dict(exclude_unset=True)}"
-    )
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
-    result = await db.execute(stmt)
-    item = result.scalar_one_or_none()
+    # Only update provided fields
+    payload = update_data.model_dump(exclude_unset=True, exclude_none=True)
+    logger.debug("Updating item %s with data: %s", item_id, payload)
+    values = {k: _COERCERS.get(k, _identity)(v) for k, v in payload.items()}
+    if "genres" in values:
+        values["genre_keys"] = genre_keys(values["genres"])
+
+    if values:
+        # Single round-trip: UPDATE ... RETURNING the fresh row
+        stmt = (
+            update(MediaItem)
+            .where(MediaItem.id == item_id)
+            .values(**values)
+            .returning(MediaItem)
+        )
+        result = await db.execute(stmt)
+        item = result.scalar_one_or_none()
+    else:
+        item = await db.get(MediaItem, item_id)
 
     if not item:
-        logger.warning(f"Cannot update item {item_id}: not found")
+        logger.warning("Cannot update item %s: not found", item_id)
         raise ItemNotFoundError(item_id)
 
-    # Update fields - only update provided fields
-    if update_data.title is not None:
-        item.title = update_data.title
-    if update_data.year is not None:
-        item.year = update_data.year
-    if update_data.media_type is not None:
-        item.media_type = update_data.media_type.value
-    if update_data.status is not None:
-        item.status = update_data.status.value
-    if update_data.tmdb_id is not None:
-        item.tmdb_id = update_data.tmdb_id
-    if update_data.imdb_id is not None:
-        item.imdb_id = update_data.imdb_id
-    if update_data.poster_url is not None:
-        item.poster_url = (
-            str(update_data.poster_url) if update_data.poster_url else None
-        )
-    if update_data.backdrop_url is not None:
-        item.backdrop_url = (
-            str(update_data.backdrop_url) if update_data.backdrop_url else None
-        )
-    if update_data.overview is not None:
-        item.overview = update_data.overview
-    if update_data.language is not None:
-        item.language = update_data.language
-    if update_data.platform is not None:
-        item.platform = update_data.platform
-    if update_data.genres is not None:
-        item.genres = update_data.genres
-    if update_data.binged_url is not None:
-        item.binged_url = (
-            str(update_data.binged_url) if update_data.binged_url else None
-        )
-
     await db.commit()
-    await db.refresh(item)
-    logger.info(f"Successfully updated item: {item.title} (ID: {item_id})")
+    invalidate_catalog_cache()
+    logger.info("Successfully updated item: %s (ID: %s)", item.title, item_id)
     return ResponseModel(data=item)
 
 
 @router.delete("/items/{item_id}")
 async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a media item."""
-    logger.debug(f"Deleting item with ID: {item_id}")
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
+    logger.debug("Deleting item with ID: %s", item_id)
+    stmt = (
+        delete(MediaItem)
+        .where(MediaItem.id == item_id)
+        .returning(MediaItem.id, MediaItem.title)
+    )
     result = await db.execute(stmt)
-    item = result.scalar_one_or_none()
+    deleted = result.one_or_none()
 
-    if not item:
-        logger.warning(f"Cannot delete item {item_id}: not found")
+    if not deleted:
+        logger.warning("Cannot delete item %s: not found", item_id)
         raise ItemNotFoundError(item_id)
 
-    await db.delete(item)
     await db.commit()
-    logger.info(f"Successfully deleted item: {item.title} (ID: {item_id})")
+    invalidate_catalog_cache()
+    logger.info("Successfully deleted item: %s (ID: %s)", deleted.title, item_id)
     return {"status": "deleted", "id": item_id}
 
 
-@router.post("/items/{item_id}/sync", response_model=ResponseModel[MediaItemResponse])
-async def sync_metadata(
-    item_id: int, sync_req: SyncRequest, db: AsyncSession = Depends(get_db)
-):
-    """Fetch fresh metadata from TMDB/IMDb and update the item."""
-    logger.debug(f"Syncing metadata for item {item_id} with request: {sync_req.dict()}")
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
+async def _item_exists(db: AsyncSession, item_id: int) -> bool:
+    stmt = select(MediaItem.id).where(MediaItem.id == item_id)
     result = await db.execute(stmt)
-    item = result.scalar_one_or_none()
+    return result.scalar_one_or_none() is not None
 
-    if not item:
-        logger.warning(f"Cannot sync metadata for item {item_id}: not found")
-        raise ItemNotFoundError(item_id)
-
-    meta_service = MetadataService()
-    match_data = None
 
+async def _fetch_sync_match(
+    meta_service: MetadataService, item_id: int, sync_req: SyncRequest
+) -> Optional[dict]:
+    """Looks up metadata for a sync request. Provider failures become ExternalApiError."""
     try:
         if sync_req.id_type == "imdb" and sync_req.imdb_id:
-            logger.debug(f"Fetching metadata by IMDB ID: {sync_req.imdb_id}")
-            match_data = await meta_service.get_details_by_imdb(
+            logger.debug("Fetching metadata by IMDB ID: %s", sync_req.imdb_id)
+            return await meta_service.get_details_by_imdb(
                 sync_req.imdb_id, sync_req.media_type
             )
         elif sync_req.id_type == "tmdb" and sync_req.tmdb_id:
-            logger.debug(f"Fetching metadata by TMDB ID: {sync_req.tmdb_id}")
-            match_data = await meta_service.get_details_by_tmdb_id(
+            logger.debug("Fetching metadata by TMDB ID: %s", sync_req.tmdb_id)
+            return await meta_service.get_details_by_tmdb_id(
                 sync_req.tmdb_id, sync_req.media_type
             )
     except Exception as e:
-        logger.error(f"Failed to fetch metadata for item {item_id}: {str(e)}")
+        logger.error("Failed to fetch metadata for item %s: %s", item_id, e)
         raise ExternalApiError("Metadata Provider", str(e))
+    return None
+
+
+async def _apply_sync_match(
+    db: AsyncSession, item_id: int, match_data: dict, media_type: MediaType
+) -> Optional[MediaItem]:
+    """Writes matched metadata onto the item and commits. Returns None if it is gone."""
+    stmt = (
+        update(MediaItem)
+        .where(MediaItem.id == item_id)
+        .values(
+            tmdb_id=match_data.get("tmdb_id"),
+            imdb_id=match_data.get("imdb_id"),
+            title=match_data.get("title"),
+            overview=match_data.get("overview"),
+            year=match_data.get("year"),
+            poster_url=match_data.get("poster_url"),
+            backdrop_url=match_data.get("backdrop_url"),
+            media_type=media_type.value,
+        )
+        .returning(MediaItem)
+    )
+    result = await db.execute(stmt)
+    item = result.scalar_one_or_none()
+    if item:
+        await db.commit()
+        invalidate_catalog_cache()
+    return item
+
+
+async def _sync_in_background(
+    item_id: int, sync_req: SyncRequest, meta_service: MetadataService
+):
+    """Fire-and-forget sync. Uses its own session since the request's is closed."""
+    try:
+        match_data = await _fetch_sync_match(meta_service, item_id, sync_req)
+        if not match_data:
+            logger.warning("Background sync: no metadata match for item %s", item_id)
+            return
+        async with AsyncSessionLocal() as db:
+            item = await _apply_sync_match(db, item_id, match_data, sync_req.media_type)
+        if item:
+            logger.info(
+                "Background sync completed for item: %s (ID: %s)", item.title, item_id
+            )
+        else:
+            logger.warning("Background sync: item %s no longer exists", item_id)
+    except Exception as e:
+        logger.error(
+            "Background sync failed for item %s: %s", item_id, e, exc_info=True
+        )
+
+
+@router.post("/items/{item_id}/sync", response_model=ResponseModel[MediaItemResponse])
+async def sync_metadata(
+    item_id: int,
+    sync_req: SyncRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    meta_service: MetadataService = Depends(get_metadata_service),
+):
+    """
+    Fetch fresh metadata from TMDB/IMDb and update the item.
+    With async_mode, the fetch and write happen after a 202 Accepted response.
+    """
+    # model_dump() runs before logging sees the call, so only build it when a
+    # handler wants DEBUG (see LOG_LEVEL / LOG_FILE_LEVEL)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Syncing metadata for item %s with request: %s",
+            item_id,
+            sync_req.model_dump(),
+        )
+
+    if sync_req.async_mode:
+        # Checked up front: the lookup happens after the response anyway
+        if not await _item_exists(db, item_id):
+            logger.warning("Cannot sync metadata for item %s: not found", item_id)
+            raise ItemNotFoundError(item_id)
+        background_tasks.add_task(_sync_in_background, item_id, sync_req, meta_service)
+        return ORJSONResponse(
+            status_code=202,
+            content={"data": {"id": item_id}, "message": "Metadata sync scheduled"},
+        )
+
+    # The existence check and the provider lookup are independent, so overlap them
+    lookup = asyncio.ensure_future(_fetch_sync_match(meta_service, item_id, sync_req))
+    try:
+        if not await _item_exists(db, item_id):
+            logger.warning("Cannot sync metadata for item %s: not found", item_id)
+            raise ItemNotFoundError(item_id)
+        match_data = await lookup
+    finally:
+        # Never leave the lookup behind: cancel it if it is still running (missing
+        # item, failed check), or retrieve its outcome so an error isn't left unread
+        if not lookup.done():
+            lookup.cancel()
+        elif not lookup.cancelled():
+            lookup.exception()
 
     if not match_data:
         logger.warning(
-            f"No metadata match found for item {item_id} with request: {sync_req.dict()}"
+            "No metadata match found for item %s with request: %s",
+            item_id,
+            sync_req.model_dump(),
         )
         raise HTTPException(status_code=404, detail="No metadata match found")
 
     # Apply updates
-    item.tmdb_id = match_data.get("tmdb_id")
-    item.imdb_id = match_data.get("imdb_id")
-    item.title = match_data.get("title")
-    item.overview = match_data.get("overview")
-    item.year = match_data.get("year")
-    item.poster_url = match_data.get("poster_url")
-    item.backdrop_url = match_data.get("backdrop_url")
-    item.media_type = sync_req.media_type.value
+    item = await _apply_sync_match(db, item_id, match_data, sync_req.media_type)
+    if not item:
+        logger.warning("Cannot sync metadata for item %s: not found", item_id)
+        raise ItemNotFoundError(item_id)
 
-    await db.commit()
-    await db.refresh(item)
-    logger.info(f"Successfully synced metadata for item: {item.title} (ID: {item_id})")
+    logger.info(
+        "Successfully synced metadata for item: %s (ID: %s)", item.title, item_id
+    )
     return ResponseModel(data=item)
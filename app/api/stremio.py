@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
 import logging
+import time
+import orjson
 
 from app.db.database import get_db
 from app.db.models import MediaItem, MediaStatus, MediaType
+from app.core.http import (
+    REVALIDATE_CACHE_CONTROL,
+    etag_for_bytes,
+    not_modified_response,
+)
+from app.services.db import reset_library_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +39,37 @@ MANIFEST = {
     "idPrefixes": ["tt", "tmdb"],
 }
 
+# The manifest never changes at runtime, so serialize it once
+# and let Stremio clients (and any proxy in front) cache it.
+MANIFEST_BYTES = orjson.dumps(MANIFEST)
+MANIFEST_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+# --- Catalog Cache ---
+# Stremio clients poll catalogs repeatedly; cache the serialized payload per type.
+# The payload doesn't depend on the catalog id, and keying on the client-supplied
+# id would let arbitrary ids grow the cache without bound.
+CATALOG_CACHE_TTL = 60  # seconds
+
+# Entries are (expires_at, payload, etag)
+_catalog_cache: Dict[str, Tuple[float, bytes, str]] = {}
+_catalog_lock = asyncio.Lock()
+
+
+def invalidate_catalog_cache():
+    """
+    Drops all cached catalog payloads and the library fingerprint used for ETags.
+    Call after the library changes.
+    """
+    _catalog_cache.clear()
+    reset_library_fingerprint()
+
+
+def _get_cached_catalog(key: str) -> Optional[Tuple[bytes, str]]:
+    entry = _catalog_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1], entry[2]
+    return None
+
 
 @router.get("/manifest.json")
 async def get_manifest():
@@ -37,26 +78,64 @@ async def get_manifest():
     Tells Stremio what this addon can do.
     """
     logger.debug("Serving Stremio manifest")
-    return MANIFEST
+    return Response(
+        content=MANIFEST_BYTES, media_type="application/json", headers=MANIFEST_HEADERS
+    )
 
 
 @router.get("/catalog/{type}/{id}.json")
-async def get_catalog(type: str, id: str, db: AsyncSession = Depends(get_db)):
+async def get_catalog(
+    type: str, id: str, request: Request, db: AsyncSession = Depends(get_db)
+):
     """
     Stremio Catalog Endpoint.
     Returns a list of 'MetaPreview' objects for the Home Screen.
     """
-    logger.debug(f"Serving Stremio catalog for type: {type}, id: {id}")
+    logger.debug("Serving Stremio catalog for type: %s, id: %s", type, id)
     # 1. Validate Type
     if type not in ["movie", "series"]:
-        logger.warning(f"Invalid catalog type requested: {type}")
+        logger.warning("Invalid catalog type requested: %s", type)
         return {"metas": []}
 
+    key = type
+    cached = _get_cached_catalog(key)
+    if cached is None:
+        async with _catalog_lock:
+            # Re-check: another request may have filled the cache while we waited
+            cached = _get_cached_catalog(key)
+            if cached is None:
+                logger.debug("Catalog cache miss for %s", key)
+                payload = orjson.dumps(await _build_catalog(type, db))
+                cached = (payload, etag_for_bytes(payload))
+                _catalog_cache[key] = (time.monotonic() + CATALOG_CACHE_TTL, *cached)
+
+    payload, etag = cached
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL},
+    )
+
+
+async def _build_catalog(type: str, db: AsyncSession) -> Dict[str, Any]:
+    """Queries the library and formats it as a Stremio catalog response."""
+
     # 2. Query DB for Available Items
     # We only show items that are marked as AVAILABLE (cached) or APPROVED.
     # Adjust this filter based on what you want to show in Stremio.
+    # Core select of plain tuples: skips ORM instance construction and identity map
     stmt = (
-        select(MediaItem)
+        select(
+            MediaItem.imdb_id,
+            MediaItem.tmdb_id,
+            MediaItem.title,
+            MediaItem.poster_url,
+            MediaItem.overview,
+        )
         .where(MediaItem.media_type == type)
         .where(MediaItem.status.in_([MediaStatus.AVAILABLE, MediaStatus.APPROVED]))
         .order_by(MediaItem.created_at.desc())
@@ -64,32 +143,26 @@ async def get_catalog(type: str, id: str, db: AsyncSession = Depends(get_db)):
     )
 
     result = await db.execute(stmt)
-    items = result.scalars().all()
-    logger.info(f"Found {len(items)} items for Stremio catalog type: {type}")
+    rows = result.all()
+    logger.info("Found %s items for Stremio catalog type: %s", len(rows), type)
 
     # 3. Format for Stremio
-    metas = []
-    for item in items:
-        # Stremio expects 'id' to be the IMDb ID (tt...) or a custom ID.
-        # Since we use Cinemeta for metadata, we MUST provide the IMDb ID
-        # so Stremio can link it correctly.
-        stremio_id = item.imdb_id if item.imdb_id else f"tmdb:{item.tmdb_id}"
-
-        if not stremio_id:
-            logger.debug(f"Skipping item {item.id} ({item.title}): no valid Stremio ID")
-            continue  # Skip items without standard IDs
-
-        metas.append(
-            {
-                "id": stremio_id,
-                "type": type,
-                "name": item.title,
-                "poster": item.poster_url,
-                "description": item.overview,
-            }
-        )
-
-    logger.debug(f"Returning {len(metas)} metas for Stremio catalog")
+    # Stremio expects 'id' to be the IMDb ID (tt...) or a custom ID.
+    # Since we use Cinemeta for metadata, we MUST provide the IMDb ID
+    # so Stremio can link it correctly. Items without any standard ID are skipped.
+    metas = [
+        {
+            "id": imdb_id or f"tmdb:{tmdb_id}",
+            "type": type,
+            "name": title,
+            "poster": poster_url,
+            "description": overview,
+        }
+        for imdb_id, tmdb_id, title, poster_url, overview in rows
+        if imdb_id or tmdb_id
+    ]
+
+    logger.debug("Returning %d metas for Stremio catalog", len(metas))
     return {"metas": metas}
 
 
@@ -101,7 +174,7 @@ async def get_streams(type: str, id: str, db: AsyncSession = Depends(get_db)):
     Currently a DUMMY implementation returning empty list.
     """
     logger.debug(
-        f"Stream request for type: {type}, id: {id} (placeholder implementation)"
+        "Stream request for type: %s, id: %s (placeholder implementation)", type, id
     )
     # Placeholder: Logic to fetch MediaLinks for this 'id' goes here later.
     return {"streams": []}
@@ -1,15 +1,39 @@
 import os
-from typing import List, Optional, Union, Any
+import re
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union, Any
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 
+_CSV_RE = re.compile(r"\s*,\s*")
+
+
+@lru_cache(maxsize=1024)
+def split_csv(raw: str) -> Tuple[str, ...]:
+    """Splits a comma-separated string into stripped, non-empty values."""
+    return tuple(x for x in _CSV_RE.split(raw.strip()) if x)
+
+
+def flatten_csv(values: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Flattens repeated parameters that may themselves be comma-separated."""
+    if not values:
+        return ()
+    return tuple(x for value in values for x in split_csv(value))
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "MediaFlow Manager"
     API_V1_STR: str = "/api/v1"
+    DEBUG: bool = False  # Include exception details in 500 responses
+    BEHIND_CDN: bool = False  # Static files are served by a CDN / reverse proxy
 
     # Database
     DATABASE_URL: str
+    # Postgres only: persistent connections, plus bursts opened and closed on demand
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_PRE_PING: bool = False  # Postgres only: liveness check on every checkout
+    AUTO_CREATE_SCHEMA: bool = True  # Disable when migrations manage the schema
 
     # External APIs
     TMDB_API_KEY: str
@@ -36,6 +60,7 @@ class Settings(BaseSettings):
     INGESTION_INTERVAL_HOURS: int = 6
     MAX_PAGES_BACKFILL: int = 5
     MAX_PAGES_MAINTENANCE: int = 1
+    SCRAPE_CONCURRENCY: int = 3  # Binged listing pages fetched at once
 
     # New Pydantic V2 Configuration for .env
     model_config = SettingsConfigDict(
@@ -50,9 +75,7 @@ class Settings(BaseSettings):
     @classmethod
     def split_comma_separated_string(cls, v: Any) -> List[str]:
         if isinstance(v, str):
-            if not v.strip():
-                return []
-            return [i.strip() for i in v.split(",") if i.strip()]
+            return list(split_csv(v))
         if isinstance(v, list):
             return v
         return []
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+# Clients must revalidate, but can reuse their copy when the ETag still matches
+REVALIDATE_CACHE_CONTROL = "private, must-revalidate"
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a strong ETag from the given parts (blake2b is fast and built-in)."""
+    raw = "|".join(str(p) for p in parts).encode()
+    return f'"{hashlib.blake2b(raw, digest_size=16).hexdigest()}"'
+
+
+def etag_for_bytes(payload: bytes) -> str:
+    """Builds a strong ETag from a serialized response body."""
+    return f'"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """Returns a 304 response if the client's If-None-Match matches the ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL},
+        )
+    return None
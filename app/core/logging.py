@@ -1,13 +1,31 @@
+import atexit
 import logging
+import queue
 import sys
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Create data/logs directory if not exists
 LOG_DIR = "data/logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "mediaflow.log")
 
+# Background listener that performs the actual console/file I/O
+_listener = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+    The stock prepare() renders the message (and any traceback) on the calling
+    thread, i.e. the event loop; here the record is queued as logged and the
+    console/file handlers format it off the loop. Arguments are therefore
+    rendered a moment later, so pass values rather than objects that change.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
 
 def setup_logging():
     """Configures the root logger for the entire application."""
@@ -15,6 +33,9 @@ def setup_logging():
     # Get console log level from environment (default INFO)
     console_level_str = os.getenv("LOG_LEVEL", "INFO").upper()
     console_level = getattr(logging, console_level_str, logging.INFO)
+    # File log level (default DEBUG, i.e. the file captures everything)
+    file_level_str = os.getenv("LOG_FILE_LEVEL", "DEBUG").upper()
+    file_level = getattr(logging, file_level_str, logging.DEBUG)
 
     # Create a custom formatter
     log_format = logging.Formatter(
@@ -27,25 +48,43 @@ def setup_logging():
     console_handler.setLevel(console_level)
     console_handler.setFormatter(log_format)
 
-    # 2. File Handler (Rotating) - DEBUG level (always captures everything)
+    # 2. File Handler (Rotating) - Configurable level, DEBUG by default
     # Rotates after 5MB, keeps last 3 backup files
     file_handler = RotatingFileHandler(
         LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
     )
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(file_level)
     file_handler.setFormatter(log_format)
 
     # Apply to Root Logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)  # Capture everything
+    # Root level follows the most verbose handler, so calls below both levels
+    # return before a record is even created
+    root_logger.setLevel(min(console_level, file_level))
 
     # Avoid duplicate logs if function called twice
+    # Loggers only enqueue records; a background thread formats them and does the
+    # blocking writes, so the event loop never waits on disk I/O or file rollover.
+    global _listener
     if not root_logger.handlers:
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
+        log_queue = queue.SimpleQueue()
+        root_logger.addHandler(_DeferredQueueHandler(log_queue))
+        _listener = QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
 
     # Silence noisy libraries (optional)
     logging.getLogger("aiosqlite").setLevel(logging.WARNING)
     logging.getLogger("aiohttp").setLevel(logging.WARNING)
 
     return root_logger
+
+
+def stop_logging():
+    """Flushes queued records and stops the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds, from either delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AsyncTokenBucket:
+    """
+    Adaptive token bucket for outgoing HTTP requests.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    The rate creeps up additively on every success and is cut
+    multiplicatively on throttling, so it converges on what the server accepts.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        rate_min: float = 0.5,
+        rate_max: Optional[float] = None,
+        increase: float = 0.1,
+        decrease: float = 2.0,
+    ):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.rate_min = rate_min
+        self.rate_max = rate_max or rate * 4
+        self.increase = increase
+        self.decrease = decrease
+
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    async def acquire(self):
+        """Waits until a request may be sent. Waiters are served in FIFO order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.rate_max, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Backs off after a 429. Honours the server's Retry-After when given."""
+        now = time.monotonic()
+        # Concurrent requests from the same burst all see the 429; cut the rate once
+        if now >= self._blocked_until:
+            self.rate = max(self.rate_min, self.rate / self.decrease)
+        self.tokens = 0
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self._blocked_until = max(self._blocked_until, now + pause)
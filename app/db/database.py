@@ -1,64 +1,198 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import bindparam, event, inspect, select, text, update
+from sqlalchemy.pool import StaticPool
 import logging
+import orjson
 from app.core.config import settings
-from app.db.models import Base
+from app.db.models import Base, genre_keys
 
 logger = logging.getLogger(__name__)
 
-# pool_pre_ping=True works for SQLite too; it checks if the connection is alive.
-# check_same_thread=False is needed for SQLite with asyncio.
-logger.debug(f"Creating database engine with URL: {settings.DATABASE_URL[:50]}...")
+IS_SQLITE = "sqlite" in settings.DATABASE_URL
+
+# SQLite full-text index over the catalog (external content table, kept in sync by triggers).
+# Trigram tokenizer: the index answers the same substring matches as
+# ILIKE '%term%' ("man" finds "Batman"), for terms of three or more characters.
+# Only titles are searched, so overviews are not indexed. Needs SQLite 3.34+.
+MEDIA_FTS_TABLE = "media_items_fts"
+
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MEDIA_FTS_TABLE} USING fts5(
+        title,
+        content='media_items', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_ai AFTER INSERT ON media_items BEGIN
+        INSERT INTO {MEDIA_FTS_TABLE}(rowid, title)
+        VALUES (new.id, new.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_ad AFTER DELETE ON media_items BEGIN
+        INSERT INTO {MEDIA_FTS_TABLE}({MEDIA_FTS_TABLE}, rowid, title)
+        VALUES ('delete', old.id, old.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_au AFTER UPDATE OF title ON media_items BEGIN
+        INSERT INTO {MEDIA_FTS_TABLE}({MEDIA_FTS_TABLE}, rowid, title)
+        VALUES ('delete', old.id, old.title);
+        INSERT INTO {MEDIA_FTS_TABLE}(rowid, title)
+        VALUES (new.id, new.title);
+    END
+    """,
+]
+
+# PostgreSQL trigram indexes, so the ILIKE '%term%' filters on title / language /
+# platform can use an index instead of scanning the table.
+# Needs the pg_trgm extension, so these are created outside create_all.
+POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_media_items_title_trgm "
+    "ON media_items USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_media_items_language_trgm "
+    "ON media_items USING gin (language gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_media_items_platform_trgm "
+    "ON media_items USING gin (platform gin_trgm_ops)",
+]
+
+
+# Columns added to existing tables after their first release. create_all never
+# alters a table that already exists, so init_db adds these in place.
+ADDED_COLUMNS = {
+    "scraped_items": ("binged_imdb_id", "languages"),
+    "media_items": ("genre_keys",),
+}
+
+# Indexes replaced by newer ones, dropped on startup so writes stop maintaining them
+RETIRED_INDEXES = ("ix_media_items_genres_gin",)
+
+
+def _engine_options() -> dict:
+    """Pool and driver options tuned per backend."""
+    if IS_SQLITE:
+        # check_same_thread=False is needed for SQLite with asyncio.
+        # timeout makes concurrent writers wait on the busy timer instead of failing fast.
+        connect_args = {"check_same_thread": False, "timeout": 30}
+        if ":memory:" in settings.DATABASE_URL:
+            # Every connection to :memory: is a new database, so share a single one
+            return {"poolclass": StaticPool, "connect_args": connect_args}
+        # Writes serialize anyway, but WAL readers run concurrently with the ingestion
+        # job (which holds a connection across network calls), so keep a small pool.
+        return {"pool_size": 5, "max_overflow": 0, "connect_args": connect_args}
+
+    # Postgres: one shared pool sized for FastAPI concurrency plus the ingestion job
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        # Dead connections are culled by age and TCP keepalive instead of a ping
+        "pool_recycle": 1800,
+        "pool_timeout": 10,
+        # Costs a round-trip per checkout; opt-in via DB_POOL_PRE_PING
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if "asyncpg" in settings.DATABASE_URL:
+        options["connect_args"] = {
+            "server_settings": {
+                # JIT compilation only slows down our short OLTP queries
+                "jit": "off",
+                "tcp_keepalives_idle": "60",
+                # Server-side cap (ms), matching command_timeout on the client
+                "statement_timeout": "60000",
+            },
+            "command_timeout": 60,
+            # asyncpg's own cache and SQLAlchemy's prepared statement cache are
+            # both LRU keyed by SQL text; size them for every distinct query shape
+            "statement_cache_size": 2048,
+            "prepared_statement_cache_size": 2048,
+        }
+    return options
+
+
+logger.debug("Creating database engine with URL: %s...", settings.DATABASE_URL[:50])
+
+
+def _json_dumps(value) -> str:
+    return orjson.dumps(value).decode()
+
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     future=True,
-    pool_pre_ping=True,
-    connect_args=(
-        {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-    ),
+    # JSON/JSONB columns (raw_data, genres) go through orjson instead of stdlib json
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
+    **_engine_options(),
 )
 
 
 # --- CRITICAL: Enable Foreign Keys for SQLite ---
 # --- OPTIMIZED SQLITE CONFIGURATION ---
-@event.listens_for(Engine, "connect")
+# Listeners are bound to this engine's sync_engine and only registered for SQLite,
+# so Postgres connections never pay for a per-connect check.
 def set_sqlite_pragma(dbapi_connection, connection_record):
-    if "sqlite" in settings.DATABASE_URL:
-        cursor = dbapi_connection.cursor()
+    cursor = dbapi_connection.cursor()
+
+    # 0. Larger pages (only takes effect on a fresh database, before WAL is enabled)
+    cursor.execute("PRAGMA page_size=8192")
+
+    # 1. Enable Foreign Keys (Critical for data integrity)
+    cursor.execute("PRAGMA foreign_keys=ON")
+
+    # 2. WAL Mode (Critical for performance/concurrency)
+    # Allows simultaneous readers and writers.
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # 3. Synchronous=NORMAL
+    # In WAL mode, this is safe and much faster than FULL.
+    # It reduces the number of fsync() calls.
+    cursor.execute("PRAGMA synchronous=NORMAL")
+
+    # 4. Increase Cache Size (Optional but recommended)
+    # Sets cache to 64MB (value is in negative KB). Default is ~2MB.
+    # This speeds up reads for your 3k+ library items.
+    cursor.execute("PRAGMA cache_size=-65536")
+
+    # 5. Store Temp Tables in RAM
+    # Speeds up complex queries and filtering
+    cursor.execute("PRAGMA temp_store=MEMORY")
 
-        # 1. Enable Foreign Keys (Critical for data integrity)
-        cursor.execute("PRAGMA foreign_keys=ON")
+    # 6. Memory-mapped I/O (256MB)
+    # Reads pages via mmap instead of pread, a big win for list/search queries.
+    cursor.execute("PRAGMA mmap_size=268435456")
 
-        # 2. WAL Mode (Critical for performance/concurrency)
-        # Allows simultaneous readers and writers.
-        cursor.execute("PRAGMA journal_mode=WAL")
+    # 7. Checkpoint the WAL less often (default 1000 pages)
+    # Avoids checkpoint latency spikes in the middle of requests.
+    cursor.execute("PRAGMA wal_autocheckpoint=2000")
 
-        # 3. Synchronous=NORMAL
-        # In WAL mode, this is safe and much faster than FULL.
-        # It reduces the number of fsync() calls.
-        cursor.execute("PRAGMA synchronous=NORMAL")
+    # Note: busy timeout is set through connect_args["timeout"]
 
-        # 4. Increase Cache Size (Optional but recommended)
-        # Sets cache to 64MB (value is in negative KB). Default is ~2MB.
-        # This speeds up reads for your 3k+ library items.
-        cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
 
-        # 5. Store Temp Tables in RAM
-        # Speeds up complex queries and filtering
-        cursor.execute("PRAGMA temp_store=MEMORY")
 
+def optimize_sqlite_on_close(dbapi_connection, connection_record):
+    """Keeps planner statistics current for the composite indexes."""
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA optimize")
         cursor.close()
+    except Exception as e:
+        logger.debug("Skipping PRAGMA optimize on close: %s", e)
+
+
+if IS_SQLITE:
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragma)
+    event.listen(engine.sync_engine, "close", optimize_sqlite_on_close)
 
 
 logger.info("Database engine created successfully")
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
+AsyncSessionLocal = async_sessionmaker(
+    engine,
     expire_on_commit=False,
     autoflush=False,
 )
@@ -71,15 +205,124 @@ async def init_db():
     logger.info("Initializing database tables...")
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Uncomment to reset DB
+        await conn.run_sync(_add_missing_columns)
+        # checkfirst: on an existing database this only adds missing tables
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips the indexes of tables that already exist, so indexes
+        # introduced by newer versions are added to old installs separately
+        await conn.run_sync(_create_missing_indexes)
+        await conn.run_sync(_backfill_genre_keys)
+        if IS_SQLITE:
+            await _init_sqlite_fts(conn)
+            # Refresh planner statistics so the composite indexes get picked up
+            await conn.execute(text("ANALYZE"))
+    if not IS_SQLITE:
+        await _init_postgres_trgm()
     logger.info("Database tables initialized successfully")
 
 
+def _add_missing_columns(sync_conn):
+    """Idempotently adds ADDED_COLUMNS to tables created by an older version."""
+    inspector = inspect(sync_conn)
+    for table_name, column_names in ADDED_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue  # create_all builds it with every column
+        existing = {col["name"] for col in inspector.get_columns(table_name)}
+        table = Base.metadata.tables[table_name]
+        for name in column_names:
+            if name in existing:
+                continue
+            col_type = table.c[name].type.compile(dialect=sync_conn.dialect)
+            logger.info("Adding missing column %s.%s", table_name, name)
+            sync_conn.execute(
+                text(f"ALTER TABLE {table_name} ADD COLUMN {name} {col_type}")
+            )
+
+
+def _create_missing_indexes(sync_conn):
+    for name in RETIRED_INDEXES:
+        sync_conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {idx["name"] for idx in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            # create() honours ddl_if, so the other backend's variants are skipped
+            logger.debug("Ensuring index %s", index.name)
+            index.create(sync_conn, checkfirst=True)
+
+
+def _backfill_genre_keys(sync_conn):
+    """Fills genre_keys for media items saved before the column existed."""
+    media_items = Base.metadata.tables["media_items"]
+    rows = sync_conn.execute(
+        select(media_items.c.id, media_items.c.genres).where(
+            media_items.c.genre_keys.is_(None)
+        )
+    ).all()
+    if not rows:
+        return
+    logger.info("Backfilling genre keys for %s media items...", len(rows))
+    sync_conn.execute(
+        update(media_items)
+        .where(media_items.c.id == bindparam("row_id"))
+        .values(genre_keys=bindparam("keys")),
+        [{"row_id": row_id, "keys": genre_keys(genres)} for row_id, genres in rows],
+    )
+
+
+async def _init_postgres_trgm():
+    """
+    Creates the trigram search indexes (PostgreSQL only).
+    Runs in its own transaction: without permission to create the extension the
+    app still works, the fuzzy filters just fall back to sequential scans.
+    """
+    try:
+        async with engine.begin() as conn:
+            for ddl in POSTGRES_TRGM_DDL:
+                await conn.execute(text(ddl))
+    except Exception as e:
+        logger.warning("Skipping pg_trgm search indexes: %s", e)
+
+
+async def _init_sqlite_fts(conn):
+    """
+    Creates the FTS5 search index for media_items (SQLite only).
+    The index is rebuilt from the content table the first time it is created.
+    """
+    result = await conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type='table' AND name=:name"),
+        {"name": MEDIA_FTS_TABLE},
+    )
+    ddl = result.scalar()
+    exists = ddl is not None
+
+    if exists and "trigram" not in ddl:
+        # Built by an older version with a word tokenizer; its triggers index
+        # columns the new table doesn't have, so they go too
+        logger.info("Recreating full-text search index with the trigram tokenizer...")
+        await conn.execute(text(f"DROP TABLE {MEDIA_FTS_TABLE}"))
+        for trigger in (
+            "media_items_fts_ai",
+            "media_items_fts_ad",
+            "media_items_fts_au",
+        ):
+            await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        exists = False
+
+    for ddl in SQLITE_FTS_DDL:
+        await conn.execute(text(ddl))
+
+    if not exists:
+        logger.info("Building full-text search index for existing media items...")
+        await conn.execute(
+            text(f"INSERT INTO {MEDIA_FTS_TABLE}({MEDIA_FTS_TABLE}) VALUES ('rebuild')")
+        )
+
+
 async def get_db():
     logger.debug("Creating new database session")
+    # The context manager closes the session on exit
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            logger.debug("Closing database session")
-            await session.close()
+        yield session
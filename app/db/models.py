@@ -7,15 +7,29 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy import JSON
 from sqlalchemy.dialects.postgresql import JSONB
 import enum
 
 Base = declarative_base()
 
+# Native binary JSONB on PostgreSQL (no re-parse on read, indexable), plain JSON on SQLite
+JSONVariant = JSON().with_variant(JSONB, "postgresql")
+
+
+def genre_keys(genres) -> list:
+    """Lower-cased copy of a genres list: the form genre filters compare against."""
+    return [genre.lower() for genre in genres or ()]
+
+
+def _genre_keys_default(context) -> list:
+    # Inserts derive genre_keys from the genres being written
+    return genre_keys(context.get_current_parameters().get("genres"))
+
 
 class MediaType(str, enum.Enum):
     MOVIE = "movie"
@@ -53,8 +67,13 @@ class ScrapedItem(Base):
     platform = Column(String, nullable=True)
     streaming_date = Column(Date, nullable=True, index=True)
 
+    # Hot keys promoted out of raw_data (read for every item during processing)
+    binged_imdb_id = Column(String, nullable=True)
+    languages = Column(String, nullable=True)
+
     # Use JSONB for PostgreSQL (faster indexing), fallback to JSON for SQLite
-    raw_data = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    # Source fields needed for the Binged fallback (full payload only if requested)
+    raw_data = Column(JSONVariant, nullable=True)
 
     scrape_status = Column(String, default=ScrapeStatus.PENDING)
     error_message = Column(String, nullable=True)
@@ -89,7 +108,14 @@ class MediaItem(Base):
     backdrop_url = Column(String, nullable=True)
 
     # Use JSONB for PostgreSQL, fallback to JSON for SQLite
-    genres = Column(JSON().with_variant(JSONB, "postgresql"), default=[])
+    # default=list builds a fresh list per row; server_default covers Core/bulk inserts
+    genres = Column(
+        JSONVariant, nullable=False, default=list, server_default=text("'[]'")
+    )
+    # Filter key for genres, so matching ignores case on every backend. Updates
+    # must set it alongside genres; NULL (rows from older versions) is backfilled
+    # by init_db.
+    genre_keys = Column(JSONVariant, nullable=True, default=_genre_keys_default)
 
     # Ingestion Source Info
     binged_url = Column(String, nullable=True)  # Link back to source if needed
@@ -98,7 +124,97 @@ class MediaItem(Base):
     streaming_date = Column(Date, nullable=True, index=True)
 
     # App State
-    status = Column(String, default=MediaStatus.NEW, index=True)
+    # Indexed through the composite listing indexes below (status is their leading column)
+    status = Column(String, default=MediaStatus.NEW)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# --- Composite Indexes ---
+
+# Dashboard / API listing: filter by status (+ type),
+# ordered by streaming_date DESC NULLS LAST, created_at DESC.
+# SQLite sorts NULLs lowest (and rejects NULLS LAST in indexes), so plain DESC matches
+# there; PostgreSQL defaults to DESC NULLS FIRST, so its indexes spell NULLS LAST out.
+Index(
+    "ix_media_items_list",
+    MediaItem.status,
+    MediaItem.media_type,
+    MediaItem.streaming_date.desc(),
+    MediaItem.created_at.desc(),
+).ddl_if(dialect="sqlite")
+
+Index(
+    "ix_media_items_status_date",
+    MediaItem.status,
+    MediaItem.streaming_date.desc(),
+    MediaItem.created_at.desc(),
+).ddl_if(dialect="sqlite")
+
+Index(
+    "ix_media_items_list_pg",
+    MediaItem.status,
+    MediaItem.media_type,
+    MediaItem.streaming_date.desc().nulls_last(),
+    MediaItem.created_at.desc(),
+).ddl_if(dialect="postgresql")
+
+Index(
+    "ix_media_items_status_date_pg",
+    MediaItem.status,
+    MediaItem.streaming_date.desc().nulls_last(),
+    MediaItem.created_at.desc(),
+).ddl_if(dialect="postgresql")
+
+# Unfiltered listing: the default sort on its own, so the first pages are read
+# straight off the index instead of sorting the whole table
+Index(
+    "ix_media_items_sort",
+    MediaItem.streaming_date.desc(),
+    MediaItem.created_at.desc(),
+    MediaItem.id.desc(),
+).ddl_if(dialect="sqlite")
+
+Index(
+    "ix_media_items_sort_pg",
+    MediaItem.streaming_date.desc().nulls_last(),
+    MediaItem.created_at.desc(),
+    MediaItem.id.desc(),
+).ddl_if(dialect="postgresql")
+
+# Stremio catalog: filter by type + status, ordered by creation date
+Index(
+    "ix_media_items_stremio",
+    MediaItem.media_type,
+    MediaItem.status,
+    MediaItem.created_at.desc(),
+)
+
+# Ingestion matches catalog rows by their Binged URL (exact equality only).
+# PostgreSQL hash indexes store just the 32-bit hash of these long URLs,
+# SQLite has no hash indexes so it gets a plain B-tree.
+Index(
+    "ix_media_items_binged_url_hash",
+    MediaItem.binged_url,
+    postgresql_using="hash",
+).ddl_if(dialect="postgresql")
+
+Index("ix_media_items_binged_url", MediaItem.binged_url).ddl_if(dialect="sqlite")
+
+# Genre containment (genre_keys @> '["action"]'), PostgreSQL only
+Index(
+    "ix_media_items_genre_keys_gin",
+    MediaItem.genre_keys,
+    postgresql_using="gin",
+    postgresql_ops={"genre_keys": "jsonb_path_ops"},
+).ddl_if(dialect="postgresql")
+
+# Processing walks PENDING scraped items in id order. The partial index only holds
+# pending rows, so it stays small once the buffer has been processed.
+Index(
+    "ix_scraped_items_pending",
+    ScrapedItem.id,
+    postgresql_where=ScrapedItem.scrape_status == ScrapeStatus.PENDING.value,
+    sqlite_where=ScrapedItem.scrape_status == ScrapeStatus.PENDING.value,
+)
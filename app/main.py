@@ -1,27 +1,31 @@
 import logging
 import os
+import sys
 import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.api import endpoints, stremio
 from app.web import dashboard
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, stop_logging
 from app.core.config import settings
 from app.core.exceptions import MediaManagerError
 from app.db.database import init_db, AsyncSessionLocal
 from app.services.ingestion import IngestionService
+from app.services.metadata import close_metadata_service
 
 # Setup global logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize Global Scheduler
-scheduler = AsyncIOScheduler()
+STATIC_DIR = "app/static"
+
+# Delay before the first scan so startup traffic gets the DB pool first
+INITIAL_SCAN_DELAY_SECONDS = 30
 
 
 async def run_scheduled_ingestion():
@@ -32,9 +36,23 @@ async def run_scheduled_ingestion():
         try:
             service = IngestionService(db)
             await service.run_daily_scan()
+            stremio.invalidate_catalog_cache()
             logger.info("Background Task: Scheduled ingestion completed successfully.")
         except Exception as e:
-            logger.error(f"Background Task Error: Ingestion failed: {e}", exc_info=True)
+            logger.error(
+                "Background Task Error: Ingestion failed: %s", e, exc_info=True
+            )
+
+
+async def _ingestion_loop():
+    """
+    Runs the scan shortly after startup, then every INGESTION_INTERVAL_HOURS.
+    Runs are sequential, so a slow scan can never overlap the next one.
+    """
+    await asyncio.sleep(INITIAL_SCAN_DELAY_SECONDS)
+    while True:
+        await run_scheduled_ingestion()
+        await asyncio.sleep(settings.INGESTION_INTERVAL_HOURS * 3600)
 
 
 @asynccontextmanager
@@ -48,38 +66,38 @@ async def lifespan(app: FastAPI):
     logger.debug("Beginning application initialization sequence")
 
     # 1. Initialize Database Tables
-    logger.debug("Initializing database tables...")
-    await init_db()
-    logger.info("Database tables initialized successfully")
-
-    # 2. Configure & Start Ingestion Scheduler
-    interval = settings.INGESTION_INTERVAL_HOURS
-    logger.debug(f"Configuring ingestion scheduler with {interval} hour interval")
-    scheduler.add_job(
-        run_scheduled_ingestion,
-        "interval",
-        hours=interval,
-        id="daily_ingestion",
-        replace_existing=True,
+    if settings.AUTO_CREATE_SCHEMA:
+        logger.debug("Initializing database tables...")
+        await init_db()
+        logger.info("Database tables initialized successfully")
+    else:
+        logger.info("AUTO_CREATE_SCHEMA disabled, skipping database initialization")
+
+    # 2. Start the ingestion loop in background so server isn't blocked
+    logger.info(
+        "Ingestion loop active: every %s hours.", settings.INGESTION_INTERVAL_HOURS
     )
-    scheduler.start()
-    logger.info(f"Ingestion Scheduler active: every {interval} hours.")
-
-    # 3. Trigger immediate scan in background so server isn't blocked
-    logger.debug("Triggering initial background ingestion task")
-    asyncio.create_task(run_scheduled_ingestion())
+    app.state.ingestion_task = asyncio.create_task(_ingestion_loop())
 
     yield  # --- Server is now running and handling requests ---
 
     # --- Shutdown Logic ---
     logger.info("MediaFlow API Shutting down (Lifespan)...")
-    logger.debug("Shutting down scheduler...")
-    scheduler.shutdown()
-    logger.info("Scheduler shutdown complete")
+    logger.debug("Stopping ingestion loop...")
+    app.state.ingestion_task.cancel()
+    await asyncio.gather(app.state.ingestion_task, return_exceptions=True)
+    logger.info("Ingestion loop stopped")
+    await close_metadata_service()
+    stop_logging()
 
 
 # Initialize FastAPI with the lifespan context manager
-app = FastAPI(title="MediaFlow API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="MediaFlow API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS Setup
 app.add_middleware(
@@ -90,18 +108,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress list/catalog payloads; small responses are not worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Ensure Static Directory exists and mount it
-os.makedirs("app/static", exist_ok=True)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# (skipped when a CDN / reverse proxy serves /static)
+if not settings.BEHIND_CDN:
+    if not os.path.isdir(STATIC_DIR):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+    app.mount(
+        "/static",
+        StaticFiles(directory=STATIC_DIR, html=False, check_dir=False),
+        name="static",
+    )
 
 # --- Global Exception Handlers ---
 
+# Errors typically caused by client input (pydantic's ValidationError is a ValueError)
+EXPECTED_ERRORS = (ValueError, KeyError)
+
 
 @app.exception_handler(MediaManagerError)
 async def media_manager_exception_handler(request: Request, exc: MediaManagerError):
     """Handles our custom application exceptions."""
-    logger.warning(f"MediaManagerError handled: {exc.code} - {exc.message}")
-    return JSONResponse(
+    logger.warning("MediaManagerError handled: %s - %s", exc.code, exc.message)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {"code": exc.code, "message": exc.message, "details": exc.details}
@@ -112,14 +143,18 @@ async def media_manager_exception_handler(request: Request, exc: MediaManagerErr
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handles all unhandled exceptions to prevent server crashes and expose standard JSON."""
-    logger.error(f"Unhandled Exception: {exc}", exc_info=True)
-    return JSONResponse(
+    if isinstance(exc, EXPECTED_ERRORS):
+        # Bad input, not a bug: skip the (expensive) traceback formatting
+        logger.warning("%s: %s", type(exc).__name__, exc)
+    else:
+        logger.error("Unhandled Exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": {
                 "code": "INTERNAL_SERVER_ERROR",
                 "message": "An unexpected error occurred. Please check the logs.",
-                "details": str(exc),  # Consider hiding this in production
+                "details": str(exc) if settings.DEBUG else None,
             }
         },
     )
@@ -141,5 +176,7 @@ if __name__ == "__main__":
     import uvicorn
 
     logger.info("Starting MediaFlow API with uvicorn...")
-    # Start the application
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000)
+    # Start the application on uvloop (see requirements.txt), which also drives the
+    # scraper and metadata clients. uvloop has no Windows build.
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, loop=loop)
@@ -18,10 +18,11 @@ class ResponseModel(BaseModel, Generic[T]):
 class MetaData(BaseModel):
     """Metadata for list responses (pagination, counts)."""
 
-    total: int
+    total: Optional[int] = None
     limit: Optional[int] = None
     skip: Optional[int] = None
     page: Optional[int] = None
+    has_more: Optional[bool] = None
 
     # Custom fields for specific contexts
     cached_count: Optional[int] = None
@@ -88,6 +89,28 @@ class MediaItemResponse(MediaItemBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MediaItemListResponse(BaseModel):
+    """Compact GET response for listings - omits the heavy overview/backdrop fields"""
+
+    id: int
+    title: str
+    year: Optional[int] = None
+    media_type: MediaType
+    status: Optional[MediaStatus] = MediaStatus.NEW
+    poster_url: Optional[str] = None
+    language: Optional[str] = None
+    platform: Optional[str] = None
+    tmdb_id: Optional[int] = None
+    imdb_id: Optional[str] = None
+    genres: List[str] = []
+    binged_url: Optional[str] = None
+    streaming_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # --- Search Result Schema ---
 
 
@@ -113,3 +136,4 @@ class SyncRequest(BaseModel):
     tmdb_id: Optional[int] = None
     imdb_id: Optional[str] = None
     media_type: MediaType
+    async_mode: bool = False  # Return 202 immediately and sync in the background
@@ -1,15 +1,126 @@
 import logging
 import aiohttp
+import orjson
 import asyncio
 import re
 import html
 import random
+from functools import lru_cache
 import os
-from typing import List, Dict, Optional
-from datetime import datetime
+import time
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+from datetime import date
+from urllib.parse import urlparse
+from app.core.config import settings
+from app.core.ratelimit import AsyncTokenBucket, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Title cleanup: drop "(...)" asides and trailing "Season N" / "S2" suffixes
+_PAREN_RE = re.compile(r"\s?\(.*?\)")
+_SEASON_RE = re.compile(r"(?i)\b(Season|S)\s*\d+.*")
+
+# Platform logo URLs end in "/<platform id>.webp"
+_PLATFORM_ID_RE = re.compile(r"/(\d+)\.webp")
+
+
+_MONTHS = {
+    m: i
+    for i, m in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
+
+
+def _parse_date(value: str) -> Optional[date]:
+    """
+    Parses Binged dates ("05 Jan 2024" or "2024-01-05") without strptime.
+    Returns None for anything else.
+    """
+    try:
+        parts = value.split()
+        if len(parts) == 3:
+            day, month, year = parts
+            return date(int(year), _MONTHS[month.title()], int(day))
+        parts = value.strip().split("-")
+        if len(parts) == 3:
+            return date(int(parts[0]), int(parts[1]), int(parts[2]))
+    except (ValueError, KeyError):
+        pass
+    return None
+
+
+# Longest wait between _fetch retries. A server's Retry-After is clamped to it
+# too, so one 503 can't park a scrape for minutes.
+RETRY_MAX_DELAY = 8.0
+
+
+# --- Detail Cache ---
+# Binged detail payloads (IMDB id, plot, images) rarely change, and the ingestion
+# loop re-scrapes the same listing pages every run. Keeping them in-process for a
+# week skips most detail requests on every run after the first.
+DETAIL_CACHE_TTL = 7 * 86400
+DETAIL_CACHE_MAX_ITEMS = 10000
+
+_detail_cache: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+
+
+def _detail_cache_get(item_id) -> Optional[Dict]:
+    entry = _detail_cache.get(item_id)
+    if entry is None:
+        return None
+    expires, detail = entry
+    if expires < time.monotonic():
+        del _detail_cache[item_id]
+        return None
+    _detail_cache.move_to_end(item_id)
+    return detail
+
+
+def _detail_cache_set(item_id, detail: Dict):
+    _detail_cache[item_id] = (time.monotonic() + DETAIL_CACHE_TTL, detail)
+    _detail_cache.move_to_end(item_id)
+    while len(_detail_cache) > DETAIL_CACHE_MAX_ITEMS:
+        _detail_cache.popitem(last=False)
+
+
+# --- Listing Cache ---
+# A listing page only changes when titles start streaming, so repeated scrapes
+# within a few minutes (manual runs, overlapping ingestion) reuse the response.
+# Entries hold the serialized JSON and every hit parses a fresh copy: callers
+# merge detail data into the listing dicts, which must never reach the cache.
+LISTING_CACHE_TTL = 600
+LISTING_CACHE_MAX_ITEMS = 64
+
+_listing_cache: "OrderedDict[bytes, Tuple[float, bytes]]" = OrderedDict()
+
+
+def _listing_cache_key(payload: Dict) -> bytes:
+    raw = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _listing_cache_get(key: bytes) -> Optional[Dict]:
+    entry = _listing_cache.get(key)
+    if entry is None:
+        return None
+    expires, body = entry
+    if expires < time.monotonic():
+        del _listing_cache[key]
+        return None
+    return orjson.loads(body)
+
+
+def _listing_cache_set(key: bytes, data: Dict):
+    _listing_cache[key] = (time.monotonic() + LISTING_CACHE_TTL, orjson.dumps(data))
+    _listing_cache.move_to_end(key)
+    while len(_listing_cache) > LISTING_CACHE_MAX_ITEMS:
+        _listing_cache.popitem(last=False)
+
 
 class BingedScraper:
     BINGED_URL = "https://www.binged.com/wp-admin/admin-ajax.php"
@@ -81,9 +192,30 @@ class BingedScraper:
         "stand-up",
         "shorts",
         "mini",
-        "music",
+        "music",  # Substring match, so the exact genre "Music" is covered too
     ]
-    GENRE_EXACT_BLOCKLIST = ["music"]
+
+    # Compiled once: one case-insensitive regex scan instead of a substring pass per
+    # blocked term (and no lowered copy of the genre string)
+    _GENRE_PARTIAL_RE = re.compile(
+        "|".join(map(re.escape, GENRE_PARTIAL_BLOCKLIST)), re.IGNORECASE
+    )
+
+    # Merged item fields kept in raw_data: the ones read by the Binged fallback
+    # (MetadataService.normalize_binged_data). Everything else is already extracted.
+    RAW_FIELDS = (
+        "title",
+        "post_title",
+        "release_year",
+        "genre",
+        "imdb",
+        "post_content",
+        "image",
+    )
+
+    # Starting request rate per host (req/s) and burst size; adapts at runtime
+    REQUESTS_PER_SECOND = 5.0
+    BURST = 10
 
     def __init__(self):
         self.headers = {
@@ -93,55 +225,95 @@ class BingedScraper:
             "X-Requested-With": "XMLHttpRequest",
             "User-Agent": random.choice(self.USER_AGENTS),
         }
-        # Concurrency Control: Allow 5 concurrent requests to Binged
+        # Concurrency Control: Allow 5 concurrent detail requests to Binged
         self.sem = asyncio.Semaphore(5)
+        # Listing pages are heavier; Binged might block if we hit it too hard
+        self.listing_sem = asyncio.BoundedSemaphore(max(1, settings.SCRAPE_CONCURRENCY))
+        # Adaptive per-host rate limiters (see _bucket_for)
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+        # Lazily created keep-alive session, reused for every page and detail fetch
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            logger.debug("Creating Binged HTTP session")
+            # Every request goes to binged.com: cache its DNS answer for the whole
+            # run and keep idle connections around between pages. Binged needs no
+            # cookies, so none are parsed or stored.
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=20,
+                    limit_per_host=10,
+                    ttl_dns_cache=600,
+                    keepalive_timeout=75,
+                    enable_cleanup_closed=True,
+                ),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+        return self._session
+
+    async def aclose(self):
+        """Closes the scraper's own HTTP session (if one was created)."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.debug("Binged HTTP session closed")
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _bucket_for(self, url: str) -> AsyncTokenBucket:
+        """One adaptive rate limiter per host (AJAX listings and detail API share it)."""
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = AsyncTokenBucket(
+                rate=self.REQUESTS_PER_SECOND, capacity=self.BURST
+            )
+        return bucket
 
     async def _fetch(
         self, session: aiohttp.ClientSession, url, method="GET", data=None, retries=3
     ):
         """
-        Robust fetch with exponential backoff for retries using provided session.
+        Robust fetch with jittered exponential backoff for retries using provided
+        session (or the server's Retry-After when it sends one).
+        Requests are paced by the host's token bucket, which backs off on 429.
         """
+        bucket = self._bucket_for(url)
         for attempt in range(1, retries + 1):
+            retry_after = None
+            await bucket.acquire()
             try:
-                if method == "POST":
-                    async with session.post(
-                        url, headers=self.headers, data=data, timeout=15
-                    ) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        elif resp.status == 429:
-                            logger.warning(
-                                f"Rate limited (429) on {url}. Waiting 60s before retry ({attempt}/{retries})..."
-                            )
-                            await asyncio.sleep(60)
-                        elif resp.status in [500, 502, 503, 504]:
-                            logger.warning(
-                                f"Server error {resp.status} on {url}. Retrying ({attempt}/{retries})..."
-                            )
-                        else:
+                async with session.request(
+                    method, url, headers=self.headers, data=data, timeout=15
+                ) as resp:
+                    if resp.status == 200:
+                        bucket.on_success()
+                        if method == "POST" or "wp-json" in url:
+                            return await resp.json(loads=orjson.loads)
+                        return await resp.text()
+                    elif resp.status == 429:
+                        bucket.on_throttle(
+                            parse_retry_after(resp.headers.get("Retry-After"))
+                        )
+                        logger.warning(
+                            f"Rate limited (429) on {url}. Slowing to {bucket.rate:.2f} req/s before retry ({attempt}/{retries})..."
+                        )
+                        continue
+                    elif resp.status in [500, 502, 503, 504]:
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        logger.warning(
+                            f"Server error {resp.status} on {url}. Retrying ({attempt}/{retries})..."
+                        )
+                    else:
+                        if method == "POST":
                             logger.error(f"Failed {url} with status {resp.status}")
-                            return None
-                else:
-                    async with session.get(
-                        url, headers=self.headers, timeout=15
-                    ) as resp:
-                        if resp.status == 200:
-                            if "wp-json" in url:
-                                return await resp.json()
-                            else:
-                                return await resp.text()
-                        elif resp.status == 429:
-                            logger.warning(
-                                f"Rate limited (429) on {url}. Waiting 60s before retry ({attempt}/{retries})..."
-                            )
-                            await asyncio.sleep(60)
-                        elif resp.status in [500, 502, 503, 504]:
-                            logger.warning(
-                                f"Server error {resp.status} on {url}. Retrying ({attempt}/{retries})..."
-                            )
-                        else:
-                            return None
+                        return None
 
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 logger.warning(
@@ -149,18 +321,25 @@ class BingedScraper:
                 )
 
             if attempt < retries:
-                await asyncio.sleep(2**attempt)
+                # Server hint first; otherwise jittered backoff so concurrent
+                # detail fetches don't retry in lockstep
+                delay = (
+                    retry_after
+                    if retry_after is not None
+                    else 2**attempt + random.uniform(0, 1)
+                )
+                await asyncio.sleep(min(delay, RETRY_MAX_DELAY))
 
         logger.error(f"Max retries reached for {url}")
         return None
 
-    def _clean_title(self, title: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean_title(title: str) -> str:
         if not title:
             return ""
-        cleaned = html.unescape(title)
-        cleaned = re.sub(r"\s?\(.*?\)", "", cleaned)
-        cleaned = re.sub(r"(?i)\b(Season|S)\s*\d+.*", "", cleaned)
-        return cleaned.strip()
+        cleaned = _PAREN_RE.sub("", html.unescape(title))
+        return _SEASON_RE.sub("", cleaned).strip()
 
     async def _fetch_item_details(
         self, session: aiohttp.ClientSession, item: Dict
@@ -168,42 +347,45 @@ class BingedScraper:
         """
         Helper task to fetch FULL details for a single item concurrently.
         Returns the entire dictionary (with images, plot, etc) if found.
+        Successful responses are served from the detail cache for DETAIL_CACHE_TTL.
         """
-        async with self.sem:
-            item_id = item.get("id")
-            title = item.get("title", "Unknown")
+        item_id = item.get("id")
+        title = item.get("title", "Unknown")
 
-            if item_id:
-                logger.debug(f"Fetching Details for item ID {item_id}")
+        if not item_id:
+            logger.warning(f"No item ID found for {title}")
+            return None
 
-                api_url = (
-                    f"https://www.binged.com/wp-json/binged-api/v1/movie/{item_id}"
-                )
-                detail_data = await self._fetch(session, api_url)
+        cached = _detail_cache_get(item_id)
+        if cached is not None:
+            logger.debug(f"Using cached details for item ID {item_id}")
+            return cached
 
-                if detail_data:
-                    # Log IMDB finding specifically to match original logging behavior
-                    if "imdb" in detail_data and detail_data["imdb"]:
-                        logger.debug(f"Found IMDB ID: {detail_data['imdb']}")
-                    else:
-                        logger.debug("No IMDB ID found in API response")
+        async with self.sem:
+            logger.debug(f"Fetching Details for item ID {item_id}")
 
-                    return detail_data
+            api_url = f"https://www.binged.com/wp-json/binged-api/v1/movie/{item_id}"
+            detail_data = await self._fetch(session, api_url)
+
+            if detail_data:
+                # Log IMDB finding specifically to match original logging behavior
+                if "imdb" in detail_data and detail_data["imdb"]:
+                    logger.debug(f"Found IMDB ID: {detail_data['imdb']}")
                 else:
-                    logger.warning(f"Failed to fetch API data for item {item_id}")
+                    logger.debug("No IMDB ID found in API response")
+
+                _detail_cache_set(item_id, detail_data)
+                return detail_data
             else:
-                logger.warning(f"No item ID found for {title}")
+                logger.warning(f"Failed to fetch API data for item {item_id}")
 
             return None
 
-    async def scrape_page(
-        self, session: aiohttp.ClientSession, page_number: int, category: str = "movie"
+    async def _fetch_listing(
+        self, session: aiohttp.ClientSession, page_number: int, category: str
     ) -> List[Dict]:
-        """
-        Scrapes a SINGLE page (50 items) concurrently.
-        """
+        """Fetches one AJAX listing page (50 items) and drops blocked genres."""
         logger.debug(f"Starting scrape for page {page_number}, category: {category}")
-        results = []
         binged_category = "Film" if category == "movie" else "Tv show"
         logger.debug(f"Using Binged category: {binged_category}")
 
@@ -224,28 +406,26 @@ class BingedScraper:
         }
         logger.debug(f"AJAX payload: {payload}")
 
-        data = await self._fetch(session, self.BINGED_URL, "POST", payload)
-        if not data or "data" not in data:
-            logger.warning(f"No data returned for page {page_number}")
-            return []
+        cache_key = _listing_cache_key(payload)
+        data = _listing_cache_get(cache_key)
+        if data is None:
+            async with self.listing_sem:
+                data = await self._fetch(session, self.BINGED_URL, "POST", payload)
+            if not data or "data" not in data:
+                logger.warning(f"No data returned for page {page_number}")
+                return []
+            _listing_cache_set(cache_key, data)
+        else:
+            logger.debug(f"Listing page {page_number} served from cache")
 
         logger.debug(f"Received {len(data['data'])} items from AJAX")
 
-        # 1. Prepare items and tasks
         valid_items = []
-        tasks = []
-
         for item in data["data"]:
             # GENRE FILTERING
             genres_str = item.get("genre", "")
             if genres_str:
-                genres_lower = genres_str.lower()
-                if any(bad in genres_lower for bad in self.GENRE_PARTIAL_BLOCKLIST):
-                    continue
-                if any(
-                    g.strip() in self.GENRE_EXACT_BLOCKLIST
-                    for g in genres_lower.split(",")
-                ):
+                if self._GENRE_PARTIAL_RE.search(genres_str):
                     continue
 
             # Basic Info
@@ -253,67 +433,108 @@ class BingedScraper:
             logger.debug(f"Processing item: {title}")
 
             valid_items.append(item)
-            # Create concurrent task
-            tasks.append(self._fetch_item_details(session, item))
 
-        # 2. Parallel Execution: Run all detail fetches at once
-        # Returns a list of detail_dictionaries (or None)
-        details_results = await asyncio.gather(*tasks)
-
-        # 3. Assemble Results
-        for item, detail_data in zip(valid_items, details_results):
-            # MERGE LOGIC: Update the item with rich data if available
-            if detail_data:
-                item.update(detail_data)
+        return valid_items
 
-            title = item.get("title", "Unknown")
-            raw_url = item.get("link", "")
-
-            # Extract IMDB (now from the merged data)
-            binged_imdb_id = None
-            if "imdb" in item and item["imdb"]:
-                binged_imdb_id = item["imdb"].strip()
-
-            # Platform extraction
-            platform_ids = item.get("platform", [])
-            platform_name = "Other"
-            if isinstance(platform_ids, list):
-                for url in platform_ids:
-                    match = re.search(r"/(\d+)\.webp", url)
-                    if match and match.group(1) in self.PLATFORM_MAPPING:
-                        platform_name = self.PLATFORM_MAPPING[match.group(1)]
-                        break
-
-            # Date extraction
-            raw_date = (
-                item.get("streaming-date")
-                or item.get("release-date")
-                or item.get("date")
-            )
-            streaming_date = None
-            if raw_date and isinstance(raw_date, str):
-                date_formats = ["%d %b %Y", "%Y-%m-%d"]
-                for fmt in date_formats:
-                    try:
-                        streaming_date = datetime.strptime(raw_date.strip(), fmt).date()
-                        break
-                    except (ValueError, TypeError):
-                        continue
-
-            # Extract Languages
-            languages = item.get("languages", "")
-
-            results.append(
-                {
-                    "title": self._clean_title(title),
-                    "year": item.get("release-year", 0),
-                    "binged_url": raw_url,
-                    "binged_imdb_id": binged_imdb_id,
-                    "platform": platform_name,
-                    "streaming_date": streaming_date,
-                    "languages": languages,
-                    "raw_data": item,  # Contains the FULL merged rich data
-                }
-            )
+    async def _with_details(
+        self, session: aiohttp.ClientSession, items: List[Dict], include_raw: bool
+    ) -> List[Dict]:
+        """Fetches details for all items at once (bounded by self.sem) and assembles them."""
+        # Returns a list of detail_dictionaries (or None)
+        details_results = await asyncio.gather(
+            *(self._fetch_item_details(session, item) for item in items)
+        )
+        return [
+            self._assemble(item, detail_data, include_raw)
+            for item, detail_data in zip(items, details_results)
+        ]
 
-        return results
+    async def scrape_page(
+        self,
+        page_number: int,
+        category: str = "movie",
+        session: Optional[aiohttp.ClientSession] = None,
+        include_raw: bool = False,
+    ) -> List[Dict]:
+        """
+        Scrapes a SINGLE page (50 items) concurrently.
+        Uses the scraper's persistent session unless one is passed in.
+        raw_data only carries RAW_FIELDS unless include_raw is set.
+        """
+        if session is None:
+            session = await self._get_session()
+        items = await self._fetch_listing(session, page_number, category)
+        return await self._with_details(session, items, include_raw)
+
+    async def scrape_all(
+        self,
+        pages: int,
+        category: str = "movie",
+        session: Optional[aiohttp.ClientSession] = None,
+        include_raw: bool = False,
+    ) -> List[Dict]:
+        """
+        Scrapes the first `pages` pages. All listings are fetched first, then the
+        detail fetches of every page run in one gather, so a slow item on one page
+        no longer holds up the next page.
+        """
+        if session is None:
+            session = await self._get_session()
+        listings = await asyncio.gather(
+            *(self._fetch_listing(session, p, category) for p in range(pages))
+        )
+        items = [item for page in listings for item in page]
+        logger.debug(f"Fetching details for {len(items)} items across {pages} pages")
+        return await self._with_details(session, items, include_raw)
+
+    def _assemble(
+        self, item: Dict, detail_data: Optional[Dict], include_raw: bool = False
+    ) -> Dict:
+        """Merges detail data into a listing item and extracts the ingestion fields."""
+        # MERGE LOGIC: Update the item with rich data if available
+        if detail_data:
+            item.update(detail_data)
+
+        # Read every field once into locals (from the merged data)
+        get = item.get
+        title = get("title", "Unknown")
+        raw_url = get("link", "")
+        imdb = get("imdb")
+        platform_ids = get("platform", [])
+        year = get("release-year", 0)
+        raw_date = get("streaming-date") or get("release-date") or get("date")
+        languages = get("languages", "")
+
+        # Extract IMDB
+        binged_imdb_id = imdb.strip() if imdb else None
+
+        # Platform extraction
+        platform_name = "Other"
+        if isinstance(platform_ids, list):
+            mapping = self.PLATFORM_MAPPING
+            for url in platform_ids:
+                match = _PLATFORM_ID_RE.search(url)
+                if match and match.group(1) in mapping:
+                    platform_name = mapping[match.group(1)]
+                    break
+
+        # Date extraction
+        streaming_date = None
+        if raw_date and isinstance(raw_date, str):
+            streaming_date = _parse_date(raw_date)
+
+        return {
+            "title": self._clean_title(title),
+            "year": year,
+            "binged_url": raw_url,
+            "binged_imdb_id": binged_imdb_id,
+            "platform": platform_name,
+            "streaming_date": streaming_date,
+            "languages": languages,
+            # The FULL merged rich data only on request; otherwise the fallback fields
+            "raw_data": (
+                item
+                if include_raw
+                else {k: item[k] for k in self.RAW_FIELDS if k in item}
+            ),
+        }
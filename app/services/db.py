@@ -1,80 +1,252 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_, cast, String, Text
+from sqlalchemy import (
+    Integer,
+    and_,
+    bindparam,
+    func,
+    literal,
+    or_,
+    cast,
+    String,
+    Text,
+    text,
+    tuple_,
+    type_coerce,
+)
 from sqlalchemy.dialects.postgresql import JSONB
-from typing import Optional, List, Tuple
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import Any, Optional, List, Tuple, Sequence
+import base64
 import logging
-from app.db.models import MediaItem
+import time
+from datetime import date, datetime
+import orjson
+from functools import lru_cache
+from app.db.models import MediaItem, genre_keys
+from app.db.database import IS_SQLITE, MEDIA_FTS_TABLE
 
 logger = logging.getLogger(__name__)
 
+# The trigram index can only answer terms of at least three characters
+FTS_MIN_TERM_LENGTH = 3
+
+
+def build_fts_query(term: str) -> Optional[str]:
+    """
+    Converts free-form user input into a safe FTS5 MATCH expression: the whole
+    term as one quoted string, which the trigram index matches as a substring of
+    the title. None for terms too short for the index.
+    """
+    if len(term) < FTS_MIN_TERM_LENGTH:
+        return None
+    return 'title : "%s"' % term.replace('"', '""')
+
+
+_FTS_MATCH_SQL = (
+    f"SELECT rowid FROM {MEDIA_FTS_TABLE} WHERE {MEDIA_FTS_TABLE} MATCH :fts_q"
+)
+
+
+def fts_title_condition(term: str):
+    """
+    Title filter for SQLite: a substring match resolved through the trigram FTS5
+    index, as a subquery so the ids never round-trip through Python. Terms too
+    short for the index use ILIKE, which matches the same titles by scanning.
+    """
+    fts_query = build_fts_query(term)
+    if fts_query is None:
+        return MediaItem.title.ilike(f"%{term}%")
+    match = text(_FTS_MATCH_SQL).bindparams(fts_q=fts_query)
+    return MediaItem.id.in_(match.columns(rowid=Integer))
+
+
+# --- Cached Filter Builders ---
+# Filter value lists repeat across requests, and SQLAlchemy expressions are immutable,
+# so the generated clauses can be safely reused. Values arrive as tuples (hashable).
+
+FILTER_COLUMNS = {
+    "status": MediaItem.status,
+    "media_type": MediaItem.media_type,
+    "language": MediaItem.language,
+    "platform": MediaItem.platform,
+}
+
+
+@lru_cache(maxsize=512)
+def _in_any(col_name: str, values: Tuple[str, ...]):
+    """Exact match against any of the values."""
+    # Deduplicated and ordered, so (a, b, a) and (b, a) bind the same parameter list.
+    # in_() compiles to a single expanding bind parameter, so the compiled statement
+    # is shared by every list length.
+    values = tuple(sorted(set(values)))
+    return FILTER_COLUMNS[col_name].in_(
+        bindparam(f"{col_name}_in", values, expanding=True)
+    )
+
+
+@lru_cache(maxsize=512)
+def _ilike_any(col_name: str, values: Tuple[str, ...]):
+    """Fuzzy match against any of the values."""
+    column = FILTER_COLUMNS[col_name]
+    return or_(*[column.ilike(f"%{v}%") for v in values])
+
+
+@lru_cache(maxsize=512)
+def _genre_conditions(values: Tuple[str, ...]) -> tuple:
+    """
+    One condition per requested genre (all must match), ignoring case.
+    Matched against genre_keys, the lower-cased copy of genres.
+    """
+    keys = genre_keys(values)
+    if not IS_SQLITE:
+        # JSONB containment (@>) is served by the GIN jsonb_path_ops index
+        keys_col = type_coerce(MediaItem.genre_keys, JSONB)
+        return tuple(keys_col.contains([key]) for key in keys)
+
+    # SQLite: search the JSON text.
+    # We search for "genre" (with quotes) to ensure we match the exact JSON string.
+    return tuple(cast(MediaItem.genre_keys, Text).like(f'%"{key}"%') for key in keys)
+
+
+def _values(values: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Drops blank entries; a tuple keeps the builder caches hashable."""
+    if not values:
+        return ()
+    return tuple(v for v in values if v)
+
+
+# --- Keyset Cursors ---
+# A cursor names the last row of a page by its sort key
+# (streaming_date, created_at, id), so the next page is a range read instead of an
+# OFFSET that has to skip every earlier row.
+
+Cursor = Tuple[Optional[date], Optional[datetime], int]
+
+
+def encode_cursor(
+    streaming_date: Optional[date], created_at: Optional[datetime], item_id: int
+) -> str:
+    """Opaque, URL-safe cursor pointing just past the item with this sort key."""
+    payload = [
+        streaming_date.isoformat() if streaming_date else None,
+        # " " separator and no zero microseconds: SQLite's CURRENT_TIMESTAMP text form
+        created_at.isoformat(sep=" ") if created_at else None,
+        item_id,
+    ]
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Reverses encode_cursor. Raises ValueError for anything else."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        streaming_date, created_at, item_id = orjson.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+        return (
+            date.fromisoformat(streaming_date) if streaming_date else None,
+            datetime.fromisoformat(created_at) if created_at else None,
+            int(item_id),
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _after_cursor(cursor: Cursor):
+    """Rows sorting after the cursor (streaming_date DESC NULLS LAST, created_at DESC, id DESC)."""
+    streaming_date, created_at, item_id = cursor
+    if created_at is None:
+        tie = MediaItem.id < item_id
+    else:
+        # SQLite keeps timestamps as text, so compare against the same text form
+        created_key = (
+            literal(created_at.isoformat(sep=" "), String) if IS_SQLITE else created_at
+        )
+        tie = tuple_(MediaItem.created_at, MediaItem.id) < tuple_(created_key, item_id)
+
+    if streaming_date is None:
+        return and_(MediaItem.streaming_date.is_(None), tie)
+    return or_(
+        MediaItem.streaming_date < streaming_date,
+        MediaItem.streaming_date.is_(None),
+        and_(MediaItem.streaming_date == streaming_date, tie),
+    )
+
 
 async def get_filtered_items(
     db: AsyncSession,
     skip: int = 0,
     limit: int = 50,
-    status: Optional[str] = None,
-    media_type: Optional[str] = None,
-    language: Optional[str] = None,
-    platform: Optional[str] = None,
-    genres: Optional[str] = None,
+    status: Optional[Sequence[str]] = None,
+    media_type: Optional[Sequence[str]] = None,
+    language: Optional[Sequence[str]] = None,
+    platform: Optional[Sequence[str]] = None,
+    genres: Optional[Sequence[str]] = None,
     q: Optional[str] = None,
-) -> Tuple[List[MediaItem], int]:
+    include_total: bool = True,
+    columns: Optional[Sequence[InstrumentedAttribute]] = None,
+    cursor: Optional[Cursor] = None,
+) -> Tuple[List[Any], Optional[int], bool]:
     """
     Shared business logic to filter and retrieve media items.
+    Returns (items, total, has_more). One extra row is fetched to compute has_more;
+    the total is only computed (as COUNT(*) OVER ()) when include_total is set.
+    Filters take lists of values; "all" on its own disables the status/type filter.
+    If columns is given, only those columns are selected and the items are returned
+    as row mappings instead of MediaItem instances.
+    With a cursor (see decode_cursor), the page starts after it and skip is ignored.
     """
     logger.debug(
-        f"Filtering items via DB Service: skip={skip}, limit={limit}, status={status}, type={media_type}, q={q}"
+        "Filtering items via DB Service: skip=%s, limit=%s, status=%s, type=%s, q=%s",
+        skip,
+        limit,
+        status,
+        media_type,
+        q,
     )
 
-    stmt = select(MediaItem)
-    count_stmt = select(func.count()).select_from(MediaItem)
+    stmt = select(*columns) if columns else select(MediaItem)
     conditions = []
 
-    # 1. Status (Exact Match, supports comma-separated)
-    if status and status != "all":
-        status_list = [s.strip() for s in status.split(",") if s.strip()]
-        if status_list:
-            conditions.append(MediaItem.status.in_(status_list))
+    status = _values(status)
+    media_type = _values(media_type)
+    language = _values(language)
+    platform = _values(platform)
+    genres = _values(genres)
+
+    # 1. Status (Exact Match, any of)
+    if status and status != ("all",):
+        conditions.append(_in_any("status", status))
 
-    # 2. Media Type (Exact Match, supports comma-separated)
-    if media_type and media_type != "all":
-        type_list = [t.strip() for t in media_type.split(",") if t.strip()]
-        if type_list:
-            conditions.append(MediaItem.media_type.in_(type_list))
+    # 2. Media Type (Exact Match, any of)
+    if media_type and media_type != ("all",):
+        conditions.append(_in_any("media_type", media_type))
 
     # 3. Language (Fuzzy Match)
     if language:
-        lang_list = [l.strip() for l in language.split(",") if l.strip()]
-        if lang_list:
-            conditions.append(
-                or_(*[MediaItem.language.ilike(f"%{l}%") for l in lang_list])
-            )
+        conditions.append(_ilike_any("language", language))
 
     # 4. Platform (Fuzzy Match)
     if platform:
-        plat_list = [p.strip() for p in platform.split(",") if p.strip()]
-        if plat_list:
-            conditions.append(
-                or_(*[MediaItem.platform.ilike(f"%{p}%") for p in plat_list])
-            )
+        conditions.append(_ilike_any("platform", platform))
 
-    # 5. Genres (Universal Text Search)
-    # Handles comma-separated values (e.g., "Action, Comedy")
+    # 5. Genres (Universal Text Search, all of)
     if genres:
-        genres_list = [g.strip() for g in genres.split(",") if g.strip()]
-        for genre in genres_list:
-            # FIX: Cast to Text universally.
-            # This works on both SQLite and Postgres and avoids JSON syntax errors.
-            # We search for "Genre" (with quotes) to ensure we match the exact JSON string.
-            conditions.append(cast(MediaItem.genres, Text).ilike(f'%"{genre}"%'))
+        conditions.extend(_genre_conditions(genres))
 
     # 6. General Search (Title OR IDs)
     if q and q.strip():
         search_term = q.strip()
+        # On SQLite, resolve title matches through the FTS5 index instead of a full scan
+        if IS_SQLITE:
+            title_cond = fts_title_condition(search_term)
+        else:
+            title_cond = MediaItem.title.ilike(f"%{search_term}%")
+
         conditions.append(
             or_(
-                MediaItem.title.ilike(f"%{search_term}%"),
+                title_cond,
                 MediaItem.imdb_id == search_term,
                 cast(MediaItem.tmdb_id, String) == search_term,
             )
@@ -83,24 +255,96 @@ async def get_filtered_items(
     # Apply conditions
     for cond in conditions:
         stmt = stmt.where(cond)
-        count_stmt = count_stmt.where(cond)
-
-    # Get Total Count
-    total_res = await db.execute(count_stmt)
-    total = total_res.scalar_one()
-
-    # Get Paginated Items
-    stmt = (
-        stmt.offset(skip)
-        .limit(limit)
-        .order_by(
-            MediaItem.streaming_date.desc().nulls_last(), MediaItem.created_at.desc()
-        )
+
+    # Get Paginated Items (limit + 1 to detect a next page).
+    # The total, when requested, rides along as a window count on the same query;
+    # a cursor page only sees the rows after the cursor, so it counts separately.
+    window_total = include_total and cursor is None
+    if window_total:
+        stmt = stmt.add_columns(func.count().over().label("total"))
+    if cursor is not None:
+        stmt = stmt.where(_after_cursor(cursor))
+    else:
+        stmt = stmt.offset(skip)
+    stmt = stmt.limit(limit + 1).order_by(
+        MediaItem.streaming_date.desc().nulls_last(),
+        MediaItem.created_at.desc(),
+        # Tiebreaker: keeps pages stable and makes the cursor unique
+        MediaItem.id.desc(),
+    )
+    result = await db.execute(stmt)
+
+    total = None
+    if columns:
+        # Plain rows skip the identity map and per-instance state entirely
+        items = result.mappings().all()
+        if window_total and items:
+            total = items[0]["total"]
+    elif window_total:
+        rows = result.all()
+        items = [row[0] for row in rows]
+        if rows:
+            total = rows[0].total
+    else:
+        items = result.scalars().all()
+
+    if include_total and total is None:
+        if skip or cursor is not None:
+            # Paged past the end: the window has no row to report on
+            count_stmt = select(func.count()).select_from(MediaItem).where(*conditions)
+            total = (await db.execute(count_stmt)).scalar_one()
+        else:
+            total = 0
+
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    return items, total, has_more
+
+
+# --- Library Fingerprint ---
+# Cheap summary of the catalog state, used to build ETags for list responses.
+# Cached briefly so conditional requests don't each pay for the aggregate query.
+LIBRARY_FINGERPRINT_TTL = 5  # seconds
+
+_fingerprint_cache: Optional[Tuple[float, str]] = None
+
+# Bumped on every invalidation; lets in-process caches key on the library state
+_library_version = 0
+
+
+async def get_library_fingerprint(db: AsyncSession) -> str:
+    """
+    Returns a string that changes whenever media items are added, edited or removed.
+    """
+    global _fingerprint_cache
+    now = time.monotonic()
+    if _fingerprint_cache and _fingerprint_cache[0] > now:
+        return _fingerprint_cache[1]
+
+    stmt = select(
+        func.count(MediaItem.id),
+        func.max(MediaItem.created_at),
+        func.max(MediaItem.updated_at),
     )
     result = await db.execute(stmt)
-    items = result.scalars().all()
+    count, max_created, max_updated = result.one()
+    fingerprint = f"{count}:{max_created}:{max_updated}"
+
+    _fingerprint_cache = (now + LIBRARY_FINGERPRINT_TTL, fingerprint)
+    return fingerprint
+
+
+def reset_library_fingerprint():
+    """Forces the next fingerprint lookup to hit the database."""
+    global _fingerprint_cache, _library_version
+    _fingerprint_cache = None
+    _library_version += 1
+
 
-    return items, total
+def get_library_version() -> int:
+    """Counter that changes whenever the library is invalidated."""
+    return _library_version
 
 
 async def get_library_stats(db: AsyncSession) -> dict:
@@ -1,18 +1,49 @@
 import logging
 import re
-import json
+import orjson
 import asyncio
 import aiohttp
+from typing import Any, Dict, Optional
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import case, func, insert, literal, or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import ScrapedItem, MediaItem, MediaType, MediaStatus, ScrapeStatus
 from app.scrapers.binged import BingedScraper
 from app.services.metadata import MetadataService
 from app.core.config import settings
+from app.db.database import IS_SQLITE
+
+if IS_SQLITE:
+    from sqlalchemy.dialects.sqlite import insert as upsert
+else:
+    from sqlalchemy.dialects.postgresql import insert as upsert
 
 logger = logging.getLogger(__name__)
 
+_YEAR_RE = re.compile(r"(\d{4})")
+
+# Rows per INSERT ... ON CONFLICT statement when saving scraped pages
+UPSERT_BATCH_SIZE = 500
+
+# PostgreSQL: when a save has at least this many unseen URLs, they are loaded
+# with COPY (asyncpg's binary protocol) and only the known URLs are upserted
+COPY_THRESHOLD = 100
+COPY_COLUMNS = (
+    "source_url",
+    "title",
+    "year",
+    "media_type",
+    "platform",
+    "streaming_date",
+    "binged_imdb_id",
+    "languages",
+    "raw_data",
+    "scrape_status",
+)
+
+# Metadata lookups in flight at once while processing a batch (keeps TMDB rate limits)
+ENRICH_CONCURRENCY = 16
+
 
 class IngestionService:
     def __init__(self, db: AsyncSession):
@@ -26,22 +57,24 @@ class IngestionService:
             return 0
         if isinstance(year_val, int):
             return year_val
-        try:
-            match = re.search(r"(\d{4})", str(year_val))
-            if match:
-                return int(match.group(1))
-            return int(year_val)
-        except (ValueError, TypeError):
-            return 0
-
-    async def _get_db_count(self, model, media_type: MediaType = None) -> int:
-        """Generic count helper."""
-        stmt = select(func.count(model.id))
-
-        # Filter by media_type if provided and model supports it
-        if media_type and hasattr(model, "media_type"):
-            stmt = stmt.where(model.media_type == media_type.value)
-
+        year_str = str(year_val)
+        # Fast path: "2024" / "2024-01-05" need no regex
+        if len(year_str) >= 4 and year_str[:4].isdigit():
+            return int(year_str[:4])
+        match = _YEAR_RE.search(year_str)
+        if match:
+            return int(match.group(1))
+        year_str = year_str.strip()
+        return int(year_str) if year_str.isdigit() else 0
+
+    async def _count_scraped(self, media_type: MediaType) -> int:
+        """Number of scraped items of one media type."""
+        # COUNT(*) can be answered from the media_type index alone
+        stmt = (
+            select(func.count())
+            .select_from(ScrapedItem)
+            .where(ScrapedItem.media_type == media_type.value)
+        )
         result = await self.db.execute(stmt)
         return result.scalar_one()
 
@@ -55,27 +88,27 @@ class IngestionService:
         logger.debug("Initializing scraper and metadata services")
 
         # Create a shared session for this entire job
-        async with aiohttp.ClientSession() as session:
+        # The scraper keeps its own keep-alive session to Binged for the whole run
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session, self.scraper:
             # Initialize metadata service with the shared session
             self.metadata = MetadataService(session=session)
 
-            # 1. Scrape Phase (Fill Buffer) - Pass session
-            await self._scrape_phase(session, MediaType.MOVIE)
-            await self._scrape_phase(session, MediaType.SERIES)
+            # 1. Scrape Phase (Fill Buffer)
+            await self._scrape_phase(MediaType.MOVIE)
+            await self._scrape_phase(MediaType.SERIES)
 
             # 2. Processing Phase (Promote All)
             await self.process_scraped_items()
 
         logger.info("Ingestion Cycle Completed.")
 
-    async def _scrape_phase(
-        self, session: aiohttp.ClientSession, media_type: MediaType
-    ):
+    async def _scrape_phase(self, media_type: MediaType):
         """Runs the scraper and fills ScrapedItems table concurrently."""
-        logger.debug(f"Starting scrape phase for {media_type.value}")
-        # Pass media_type to get correct count for maintenance logic
-        count = await self._get_db_count(ScrapedItem, media_type)
-        logger.debug(f"Current {media_type.value} count in database: {count}")
+        logger.debug("Starting scrape phase for %s", media_type.value)
+        # Count per media_type to pick the right mode for this phase
+        count = await self._count_scraped(media_type)
+        logger.debug("Current %s count in database: %s", media_type.value, count)
 
         if count < 10:
             mode = "BACKFILL"
@@ -85,101 +118,283 @@ class IngestionService:
             max_pages = settings.MAX_PAGES_MAINTENANCE
 
         logger.info(
-            f"Scraping {media_type.value} in {mode} mode ({max_pages} pages). Current DB Count: {count}"
+            "Scraping %s in %s mode (%s pages). Current DB Count: %s",
+            media_type.value,
+            mode,
+            max_pages,
+            count,
         )
 
         category_str = "movie" if media_type == MediaType.MOVIE else "series"
-        logger.debug(f"Using category string: {category_str}")
+        logger.debug("Using category string: %s", category_str)
 
-        # Concurrency Control: Binged might block if we hit it too hard
-        # Using a semaphore to limit concurrent page fetches
-        sem = asyncio.Semaphore(3)
-
-        async def fetch_page_safe(p_num):
-            async with sem:
-                logger.debug(
-                    f"Scraping page {p_num + 1}/{max_pages} for {media_type.value}"
-                )
-                return await self.scraper.scrape_page(session, p_num, category_str)
-
-        tasks = [fetch_page_safe(i) for i in range(max_pages)]
-
-        # Run all page scrapes concurrently
-        results = await asyncio.gather(*tasks)
-
-        # Flatten results (results is a list of lists)
-        total_items_found = 0
-        new_items_saved = 0
-
-        for page_items in results:
-            if not page_items:
-                continue
-
-            total_items_found += len(page_items)
-            activity = await self._save_raw_batch(page_items, media_type)
-            new_items_saved += activity
-            logger.debug(f"Saved {activity} items from a page")
-
-            # Maintenance mode optimization: stop if we find a page with 0 updates
-            if mode == "MAINTENANCE" and activity == 0:
-                logger.info("Maintenance Scan: No new items found in this batch.")
-                # We don't break here because other concurrent tasks are running
+        # Listings for all pages first, then every detail fetch in one batch
+        page_items = await self.scraper.scrape_all(max_pages, category_str)
+        total_items_found = len(page_items)
+        new_items_saved = await self._save_raw_batch(page_items, media_type)
 
         logger.info(
-            f"Scrape Phase Summary ({media_type.value}): Found {total_items_found} items, Saved/Updated {new_items_saved}"
+            "Scrape Phase Summary (%s): Found %s items, Saved/Updated %s",
+            media_type.value,
+            total_items_found,
+            new_items_saved,
         )
 
     async def _save_raw_batch(self, items: list, media_type: MediaType) -> int:
-        """Upserts raw items into ScrapedItem table. Returns count of changes."""
+        """
+        Upserts raw items into ScrapedItem table with INSERT ... ON CONFLICT (source_url),
+        one statement per UPSERT_BATCH_SIZE rows and a single commit.
+        Returns the number of rows inserted or changed; unchanged rows aren't counted.
+        """
         if not items:
             logger.debug("No items to save in batch")
             return 0
 
-        logger.debug(f"Saving batch of {len(items)} items for {media_type.value}")
-        activity_count = 0
+        logger.debug("Saving batch of %s items for %s", len(items), media_type.value)
 
-        # 1. Bulk Fetch
-        source_urls = [item["binged_url"] for item in items]
-        stmt = select(ScrapedItem).where(ScrapedItem.source_url.in_(source_urls))
-        result = await self.db.execute(stmt)
-
-        existing_items_map = {item.source_url: item for item in result.scalars().all()}
-        logger.debug(f"Found {len(existing_items_map)} existing items in database")
+        # Loop invariants, looked up once per batch instead of once per item
+        media_value = media_type.value
+        pending = ScrapeStatus.PENDING.value
+        parse_year = self._parse_safe_year
 
+        # Keyed by source_url: one statement may not touch the same row twice
+        rows = {}
         for item_data in items:
+            get = item_data.get
             source_url = item_data["binged_url"]
-            existing = existing_items_map.get(source_url)
-            title = item_data.get("title", "Unknown")
-
-            # PREPARE RAW DATA
-            raw_blob = item_data["raw_data"]
-            raw_blob["inferred_type"] = media_type.value
-            if item_data.get("binged_imdb_id"):
-                raw_blob["binged_imdb_id"] = item_data["binged_imdb_id"]
-
-            if existing:
-                existing.raw_data = raw_blob
-                existing.scrape_status = ScrapeStatus.PENDING
-                logger.info(f"Updated Raw Item: {title}")
-                activity_count += 1
-            else:
-                new_scraped = ScrapedItem(
-                    source_url=source_url,
-                    title=title,
-                    year=self._parse_safe_year(item_data.get("year")),
-                    media_type=media_type.value,  # Explicitly save media_type
-                    platform=item_data["platform"],
-                    streaming_date=item_data.get("streaming_date"),
-                    raw_data=raw_blob,
-                    scrape_status=ScrapeStatus.PENDING,
-                )
-                self.db.add(new_scraped)
-                logger.info(f"New Raw Item Scraped: {title}")
-                activity_count += 1
+
+            # PREPARE RAW DATA (a copy: the scraper's dict is left as it was)
+            raw_blob = {**item_data["raw_data"], "inferred_type": media_value}
+
+            rows[source_url] = {
+                "source_url": source_url,
+                "title": get("title", "Unknown"),
+                "year": parse_year(get("year")),
+                "media_type": media_value,  # Explicitly save media_type
+                "platform": item_data["platform"],
+                "streaming_date": get("streaming_date"),
+                "binged_imdb_id": get("binged_imdb_id"),
+                "languages": get("languages"),
+                "raw_data": raw_blob,
+                "scrape_status": pending,
+            }
+
+        rows = list(rows.values())
+        saved = 0
+        if not IS_SQLITE and len(rows) >= COPY_THRESHOLD:
+            remaining = await self._copy_raw(rows)
+            saved += len(rows) - len(remaining)
+            rows = remaining
+
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            stmt = upsert(ScrapedItem).values(rows[start : start + UPSERT_BATCH_SIZE])
+            excluded = stmt.excluded
+            raw_changed = ScrapedItem.raw_data.is_distinct_from(excluded.raw_data)
+            # Existing rows only get a fresh payload and go back to PENDING.
+            # Rows that are already PENDING with identical data are left untouched,
+            # and an unchanged raw_data keeps its stored (possibly TOASTed) value.
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ScrapedItem.source_url],
+                set_={
+                    "raw_data": case(
+                        (raw_changed, excluded.raw_data), else_=ScrapedItem.raw_data
+                    ),
+                    "binged_imdb_id": excluded.binged_imdb_id,
+                    "languages": excluded.languages,
+                    "scrape_status": excluded.scrape_status,
+                    "updated_at": func.now(),
+                },
+                where=or_(
+                    raw_changed,
+                    ScrapedItem.binged_imdb_id.is_distinct_from(
+                        excluded.binged_imdb_id
+                    ),
+                    ScrapedItem.languages.is_distinct_from(excluded.languages),
+                    ScrapedItem.scrape_status.is_distinct_from(excluded.scrape_status),
+                ),
+            )
+            # Counts inserted rows and updated ones; rows the WHERE skips are excluded
+            result = await self.db.execute(stmt)
+            saved += result.rowcount
 
         await self.db.commit()
-        logger.debug(f"Committed {activity_count} changes to database")
-        return activity_count
+        logger.debug("Committed %s new or changed scraped items", saved)
+        return saved
+
+    async def _copy_raw(self, rows: list) -> list:
+        """
+        COPYs the rows whose source_url is not stored yet (PostgreSQL only).
+        Returns the rows that still need the upsert path.
+        """
+        urls = [row["source_url"] for row in rows]
+        result = await self.db.execute(
+            select(ScrapedItem.source_url).where(ScrapedItem.source_url.in_(urls))
+        )
+        existing = set(result.scalars().all())
+        new_rows = [row for row in rows if row["source_url"] not in existing]
+        if len(new_rows) < COPY_THRESHOLD:
+            return rows
+
+        records = [
+            tuple(
+                orjson.dumps(row[col]).decode() if col == "raw_data" else row[col]
+                for col in COPY_COLUMNS
+            )
+            for row in new_rows
+        ]
+        # Runs on the session's connection, so it commits with the upserts
+        conn = await self.db.connection()
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            ScrapedItem.__tablename__, records=records, columns=list(COPY_COLUMNS)
+        )
+        logger.debug("Copied %s new scraped items", len(records))
+        return [row for row in rows if row["source_url"] in existing]
+
+    def _resolve_media_type(self, scraped: ScrapedItem) -> MediaType:
+        media_type_str = scraped.media_type or scraped.raw_data.get(
+            "inferred_type", "movie"
+        )
+        try:
+            return MediaType(media_type_str)
+        except ValueError:
+            return MediaType.MOVIE
+
+    def _binged_imdb_id(self, scraped: ScrapedItem) -> Optional[str]:
+        return scraped.binged_imdb_id or scraped.raw_data.get("binged_imdb_id")
+
+    async def _prefetch_imdb(self, pending_items) -> Dict[tuple, Any]:
+        """
+        Looks up the Binged IMDB ids of a batch, each (id, media type) once.
+        Returns {(imdb_id, media_type): match_data or exception}.
+        """
+        by_type: Dict[MediaType, list] = {}
+        for scraped in pending_items:
+            imdb_id = self._binged_imdb_id(scraped)
+            if imdb_id:
+                media_type = self._resolve_media_type(scraped)
+                by_type.setdefault(media_type, []).append(imdb_id)
+
+        found = await asyncio.gather(
+            *(
+                self.metadata.get_details_by_imdb_many(ids, media_type)
+                for media_type, ids in by_type.items()
+            )
+        )
+        return {
+            (imdb_id, media_type): match_data
+            for media_type, results in zip(by_type, found)
+            for imdb_id, match_data in results.items()
+        }
+
+    async def _fetch_match(
+        self,
+        scraped: ScrapedItem,
+        sem: asyncio.Semaphore,
+        imdb_matches: Dict[tuple, Any],
+    ):
+        """Metadata matching for one scraped item. Returns (media_type, match_data)."""
+        media_type = self._resolve_media_type(scraped)
+        binged_imdb = self._binged_imdb_id(scraped)
+        title = scraped.title
+
+        # METADATA MATCHING - IMDB lookups were resolved for the whole batch
+        match_data = None
+        if binged_imdb:
+            match_data = imdb_matches.get((binged_imdb, media_type))
+            if isinstance(match_data, Exception):
+                raise match_data
+
+        if not match_data:
+            async with sem:
+                match_data = await self.metadata.search_by_query(
+                    title, scraped.year, media_type
+                )
+
+        # --- FALLBACK LOGIC START ---
+        if not match_data:
+            logger.info(
+                "TMDB/Cinemeta failed for '%s'. Using Binged data as fallback.", title
+            )
+            match_data = self.metadata.normalize_binged_data(scraped.raw_data)
+            match_data["title"] = title
+        # --- FALLBACK LOGIC END ---
+
+        return media_type, match_data
+
+    def _apply_update(
+        self,
+        media,
+        match_data: Optional[Dict],
+        languages: str,
+        scraped: ScrapedItem,
+        target_status: MediaStatus,
+    ):
+        """
+        Applies a scraped item to an existing MediaItem, or to a new row dict
+        still queued for insert in this batch.
+        """
+        if isinstance(media, dict):
+            get, put = media.get, media.__setitem__
+        else:
+
+            def get(key):
+                return getattr(media, key)
+
+            def put(key, value):
+                setattr(media, key, value)
+
+        # 1. Always update metadata if available (IDs, Poster, Overview)
+        if match_data:
+            for key in ("tmdb_id", "imdb_id", "overview", "poster_url", "backdrop_url"):
+                put(key, match_data.get(key) or get(key))
+
+        if languages:
+            put("language", languages)
+
+        # 2. Update Source Info ONLY if newer
+        put("platform", scraped.platform)
+        put("binged_url", scraped.source_url)
+
+        # --- STATUS LOGIC ---
+        # Only auto-approve if the source is high quality
+        if target_status == MediaStatus.APPROVED:
+            put("status", MediaStatus.APPROVED.value)
+
+        logger.info("Updated MediaItem Source: %s", get("title"))
+
+    async def _prefetch_media(self, pending_items, matches):
+        """
+        Loads the existing MediaItems matching a batch by TMDB id, IMDB id or
+        Binged URL. Returns (tmdb_map, imdb_map, url_map).
+        """
+        tmdb_ids, imdb_ids = set(), set()
+        for match in matches:
+            if isinstance(match, Exception) or not match[1]:
+                continue
+            match_data = match[1]
+            if match_data.get("tmdb_id"):
+                tmdb_ids.add(match_data["tmdb_id"])
+            if match_data.get("imdb_id"):
+                imdb_ids.add(match_data["imdb_id"])
+        urls = {scraped.source_url for scraped in pending_items}
+
+        conds = [MediaItem.binged_url.in_(urls)]
+        if tmdb_ids:
+            conds.append(MediaItem.tmdb_id.in_(tmdb_ids))
+        if imdb_ids:
+            conds.append(MediaItem.imdb_id.in_(imdb_ids))
+        result = await self.db.execute(select(MediaItem).where(or_(*conds)))
+
+        tmdb_map, imdb_map, url_map = {}, {}, {}
+        for media in result.scalars().all():
+            if media.tmdb_id:
+                tmdb_map.setdefault(media.tmdb_id, media)
+            if media.imdb_id:
+                imdb_map.setdefault(media.imdb_id, media)
+            if media.binged_url:
+                url_map.setdefault(media.binged_url, media)
+        return tmdb_map, imdb_map, url_map
 
     async def process_scraped_items(self):
         """
@@ -190,11 +405,20 @@ class IngestionService:
         batch_size = 50
         total_processed = 0
 
+        last_id = 0
+
         while True:
-            # Fetch a batch of pending items
+            # Fetch the next batch of pending items. Keyset paging on id resumes
+            # where the previous batch ended instead of rescanning from the start.
+            # The status is inlined so even generic plans match the partial index.
             stmt = (
                 select(ScrapedItem)
-                .where(ScrapedItem.scrape_status == ScrapeStatus.PENDING)
+                .where(
+                    ScrapedItem.scrape_status
+                    == literal(ScrapeStatus.PENDING.value, literal_execute=True),
+                    ScrapedItem.id > last_id,
+                )
+                .order_by(ScrapedItem.id)
                 .limit(batch_size)
             )
 
@@ -203,57 +427,47 @@ class IngestionService:
 
             if not pending_items:
                 break
-
-            logger.info(f"Processing batch of {len(pending_items)} items...")
+            last_id = pending_items[-1].id
+
+            logger.info("Processing batch of %s items...", len(pending_items))
+
+            # Resolve metadata for the whole batch concurrently; DB writes stay sequential
+            imdb_matches = await self._prefetch_imdb(pending_items)
+            sem = asyncio.BoundedSemaphore(ENRICH_CONCURRENCY)
+            matches = await asyncio.gather(
+                *(
+                    self._fetch_match(scraped, sem, imdb_matches)
+                    for scraped in pending_items
+                ),
+                return_exceptions=True,
+            )
 
             # --- Batch Cache ---
-            # Used to track items created/loaded in THIS batch to prevent duplicates
-            batch_tmdb_map = {}
-            batch_imdb_map = {}
-            batch_url_map = {}
+            # Every MediaItem the batch could touch, loaded in one query. Items
+            # created in THIS batch are added too, to prevent duplicates.
+            batch_tmdb_map, batch_imdb_map, batch_url_map = await self._prefetch_media(
+                pending_items, matches
+            )
+            # New catalog rows, as dicts until the bulk insert below
+            new_rows = []
+            # Status transitions, written with two statements after the loop
+            processed_ids = []
+            errored = []
 
-            for scraped in pending_items:
+            for scraped, match in zip(pending_items, matches):
                 try:
+                    if isinstance(match, Exception):
+                        raise match
+                    media_type, match_data = match
+
                     # 1. Extract Data
                     raw = scraped.raw_data
 
-                    media_type_str = scraped.media_type or raw.get(
-                        "inferred_type", "movie"
-                    )
-                    try:
-                        media_type = MediaType(media_type_str)
-                    except ValueError:
-                        media_type = MediaType.MOVIE
-
-                    languages = raw.get("languages", "")
-
-                    # 2. Metadata Matching
-                    binged_imdb = raw.get("binged_imdb_id")
+                    # Typed columns first; raw_data only for rows saved before they existed
+                    languages = scraped.languages or raw.get("languages", "")
                     title = scraped.title
                     year = scraped.year
 
-                    # METADATA MATCHING - Using injected session in metadata service
-                    match_data = None
-                    if binged_imdb:
-                        match_data = await self.metadata.get_details_by_imdb(
-                            binged_imdb, media_type
-                        )
-
-                    if not match_data:
-                        match_data = await self.metadata.search_by_query(
-                            title, year, media_type
-                        )
-
-                    # --- FALLBACK LOGIC START ---
-                    if not match_data:
-                        logger.info(
-                            f"TMDB/Cinemeta failed for '{title}'. Using Binged data as fallback."
-                        )
-                        match_data = self.metadata.normalize_binged_data(raw)
-                        match_data["title"] = title
-
-                    # --- FALLBACK LOGIC END ---
-
                     # --- DETERMINE TARGET STATUS ---
                     # Default is NEW unless we have a high-quality source
                     target_status = MediaStatus.APPROVED
@@ -263,140 +477,102 @@ class IngestionService:
                     # 3. Upsert MediaItem
                     existing_media = None
 
-                    # A. Check Batch Cache First
+                    # Look up by TMDB id, then IMDB id, then Binged URL
                     if match_data:
-                        if (
-                            match_data.get("tmdb_id")
-                            and match_data["tmdb_id"] in batch_tmdb_map
-                        ):
-                            existing_media = batch_tmdb_map[match_data["tmdb_id"]]
-                        elif (
-                            match_data.get("imdb_id")
-                            and match_data["imdb_id"] in batch_imdb_map
-                        ):
-                            existing_media = batch_imdb_map[match_data["imdb_id"]]
-
-                    if not existing_media and scraped.source_url in batch_url_map:
-                        existing_media = batch_url_map[scraped.source_url]
-
-                    # B. Check Database if not in cache
+                        if match_data.get("tmdb_id"):
+                            existing_media = batch_tmdb_map.get(match_data["tmdb_id"])
+                        if not existing_media and match_data.get("imdb_id"):
+                            existing_media = batch_imdb_map.get(match_data["imdb_id"])
+
                     if not existing_media:
-                        if match_data:
-                            conds = []
-                            if match_data.get("tmdb_id"):
-                                conds.append(MediaItem.tmdb_id == match_data["tmdb_id"])
-                            if match_data.get("imdb_id"):
-                                conds.append(MediaItem.imdb_id == match_data["imdb_id"])
-
-                            if conds:
-                                media_stmt = select(MediaItem).where(or_(*conds))
-                                media_res = await self.db.execute(media_stmt)
-                                existing_media = media_res.scalars().first()
-
-                        if not existing_media:
-                            url_stmt = select(MediaItem).where(
-                                MediaItem.binged_url == scraped.source_url
-                            )
-                            url_res = await self.db.execute(url_stmt)
-                            existing_media = url_res.scalars().first()
-
-                        # Add found DB item to Cache
-                        if existing_media:
-                            if existing_media.tmdb_id:
-                                batch_tmdb_map[existing_media.tmdb_id] = existing_media
-                            if existing_media.imdb_id:
-                                batch_imdb_map[existing_media.imdb_id] = existing_media
-                            if existing_media.binged_url:
-                                batch_url_map[existing_media.binged_url] = (
-                                    existing_media
-                                )
+                        existing_media = batch_url_map.get(scraped.source_url)
 
                     if existing_media:
                         # UPDATE existing - Smart Date Logic
-
-                        # 1. Always update metadata if available (IDs, Poster, Overview)
-                        if match_data:
-                            existing_media.tmdb_id = (
-                                match_data.get("tmdb_id") or existing_media.tmdb_id
-                            )
-                            existing_media.imdb_id = (
-                                match_data.get("imdb_id") or existing_media.imdb_id
-                            )
-                            existing_media.overview = (
-                                match_data.get("overview") or existing_media.overview
-                            )
-                            existing_media.poster_url = (
-                                match_data.get("poster_url")
-                                or existing_media.poster_url
-                            )
-                            existing_media.backdrop_url = (
-                                match_data.get("backdrop_url")
-                                or existing_media.backdrop_url
-                            )
-
-                        if languages:
-                            existing_media.language = languages
-
-                        # 2. Update Source Info ONLY if newer
-                        existing_media.platform = scraped.platform
-                        existing_media.binged_url = scraped.source_url
-
-                        # --- STATUS LOGIC ---
-                        # Only auto-approve if the source is high quality
-                        if target_status == MediaStatus.APPROVED:
-                            existing_media.status = MediaStatus.APPROVED
-
-                        logger.info(f"Updated MediaItem Source: {existing_media.title}")
+                        self._apply_update(
+                            existing_media,
+                            match_data,
+                            languages,
+                            scraped,
+                            target_status,
+                        )
 
                     else:
-                        # CREATE new
-                        new_media = MediaItem(
-                            title=match_data.get("title") if match_data else title,
-                            year=match_data.get("year") if match_data else year,
-                            media_type=media_type.value,
-                            language=languages,
-                            tmdb_id=match_data.get("tmdb_id") if match_data else None,
-                            imdb_id=match_data.get("imdb_id") if match_data else None,
-                            overview=match_data.get("overview") if match_data else None,
-                            poster_url=(
+                        # CREATE new (inserted in bulk once the batch is resolved)
+                        new_row = {
+                            "title": match_data.get("title") if match_data else title,
+                            "year": match_data.get("year") if match_data else year,
+                            "media_type": media_type.value,
+                            "language": languages,
+                            "tmdb_id": (
+                                match_data.get("tmdb_id") if match_data else None
+                            ),
+                            "imdb_id": (
+                                match_data.get("imdb_id") if match_data else None
+                            ),
+                            "overview": (
+                                match_data.get("overview") if match_data else None
+                            ),
+                            "poster_url": (
                                 match_data.get("poster_url") if match_data else None
                             ),
-                            backdrop_url=(
+                            "backdrop_url": (
                                 match_data.get("backdrop_url") if match_data else None
                             ),
-                            genres=match_data.get("genres", []) if match_data else [],
-                            binged_url=scraped.source_url,
-                            platform=scraped.platform,
-                            streaming_date=scraped.streaming_date,
-                            status=target_status,  # Use the determined status (NEW or APPROVED)
-                        )
-                        self.db.add(new_media)
-                        logger.info(f"Promoted New MediaItem: {new_media.title}")
+                            "genres": (
+                                (match_data.get("genres") or []) if match_data else []
+                            ),
+                            "binged_url": scraped.source_url,
+                            "platform": scraped.platform,
+                            "streaming_date": scraped.streaming_date,
+                            # Use the determined status (NEW or APPROVED)
+                            "status": target_status.value,
+                        }
+                        new_rows.append(new_row)
+                        logger.info("Promoted New MediaItem: %s", new_row["title"])
 
                         # Add new item to Cache immediately
-                        if new_media.tmdb_id:
-                            batch_tmdb_map[new_media.tmdb_id] = new_media
-                        if new_media.imdb_id:
-                            batch_imdb_map[new_media.imdb_id] = new_media
-                        if new_media.binged_url:
-                            batch_url_map[new_media.binged_url] = new_media
+                        if new_row["tmdb_id"]:
+                            batch_tmdb_map[new_row["tmdb_id"]] = new_row
+                        if new_row["imdb_id"]:
+                            batch_imdb_map[new_row["imdb_id"]] = new_row
+                        batch_url_map[new_row["binged_url"]] = new_row
 
                     # 4. Mark ScrapedItem as Complete
-                    scraped.scrape_status = ScrapeStatus.PROCESSED
+                    processed_ids.append(scraped.id)
 
                 except Exception as e:
-                    logger.error(f"Error processing scraped item {scraped.id}: {e}")
-                    scraped.scrape_status = ScrapeStatus.ERROR
-                    scraped.error_message = str(e)
+                    logger.error("Error processing scraped item %s: %s", scraped.id, e)
+                    errored.append(
+                        {
+                            "id": scraped.id,
+                            "scrape_status": ScrapeStatus.ERROR.value,
+                            "error_message": str(e),
+                        }
+                    )
+
+            # One executemany INSERT for every item created in this batch
+            if new_rows:
+                await self.db.execute(insert(MediaItem), new_rows)
+
+            if processed_ids:
+                await self.db.execute(
+                    update(ScrapedItem)
+                    .where(ScrapedItem.id.in_(processed_ids))
+                    .values(scrape_status=ScrapeStatus.PROCESSED.value)
+                )
+            if errored:
+                # Bulk UPDATE by primary key: one executemany for all failures
+                await self.db.execute(update(ScrapedItem), errored)
 
             # Commit after the batch
             await self.db.commit()
             total_processed += len(pending_items)
-            logger.info(f"Batch committed. Total processed: {total_processed}")
+            logger.info("Batch committed. Total processed: %s", total_processed)
 
         if total_processed == 0:
             logger.info("No pending items to process.")
         else:
             logger.info(
-                f"Processing complete. Total items processed: {total_processed}"
+                "Processing complete. Total items processed: %s", total_processed
             )
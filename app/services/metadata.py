@@ -1,13 +1,49 @@
 import logging
 import aiohttp
 import asyncio
-from typing import Optional, Dict, Any
+import random
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from contextlib import asynccontextmanager
 from app.core.config import settings
+from app.core.ratelimit import AsyncTokenBucket, parse_retry_after
 from app.db.models import MediaType
 
 logger = logging.getLogger(__name__)
 
+# TMDB allows about 50 requests/s per API key: start below that and adapt
+TMDB_REQUESTS_PER_SECOND = 40.0
+TMDB_MAX_REQUESTS_PER_SECOND = 50.0
+
+# Seconds to back off on a 429 without a usable Retry-After header
+TMDB_DEFAULT_RETRY_AFTER = 5.0
+
+# Decorrelated jitter between failed attempts: each delay is drawn from
+# [base, 3 * previous delay], capped, so concurrent lookups don't retry in lockstep
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 5.0
+
+# TMDB responses (404s included) are reused for this long, so repeated ids in a
+# batch, concurrent identical lookups and repeated dashboard syncs cost one request
+TMDB_CACHE_TTL = 900
+TMDB_CACHE_MAX_ITEMS = 2048
+
+# A typed IMDB lookup sends Cinemeta a hedge request only if TMDB hasn't answered
+# within about its p95 latency, so fast TMDB hits never touch Cinemeta
+CINEMETA_HEDGE_DELAY = 0.5
+
+# The rate budget belongs to the API key, so every service instance shares one limiter
+_tmdb_limiter = AsyncTokenBucket(
+    TMDB_REQUESTS_PER_SECOND, rate_max=TMDB_MAX_REQUESTS_PER_SECOND
+)
+
+# Likewise the response cache: services are created per scan and per request,
+# so a per-instance cache would rarely see the same id twice.
+# (endpoint, params) -> (expires, response); None marks a cached 404
+_tmdb_cache: "OrderedDict[tuple, Tuple[float, Optional[Dict]]]" = OrderedDict()
+_tmdb_inflight: Dict[tuple, asyncio.Future] = {}
+
 
 class MetadataService:
     def __init__(self, session: Optional[aiohttp.ClientSession] = None):
@@ -19,7 +55,9 @@ class MetadataService:
             "Content-Type": "application/json;charset=utf-8",
         }
         self.external_session = session
-        self.delay = 0.2
+        self.limiter = _tmdb_limiter
+        self._cache = _tmdb_cache
+        self._inflight = _tmdb_inflight
         self.cinemeta_url = "https://v3-cinemeta.strem.io/meta"
 
     @asynccontextmanager
@@ -27,13 +65,12 @@ class MetadataService:
         """
         Context manager to yield a session.
         Uses the external persistent session if available,
-        otherwise creates a temporary one for the scope of the block.
+        otherwise the process-wide pooled session (never a throwaway one).
         """
         if self.external_session and not self.external_session.closed:
             yield self.external_session
         else:
-            async with aiohttp.ClientSession() as session:
-                yield session
+            yield _get_shared_session()
 
     # --- NEW HELPER METHOD ---
     def normalize_binged_data(self, raw_data: Dict) -> Dict:
@@ -45,11 +82,13 @@ class MetadataService:
 
         # 1. Parse Year
         year = 0
-        try:
-            if raw_data.get("release_year"):
-                year = int(raw_data["release_year"])
-        except (ValueError, TypeError):
-            pass
+        release_year = raw_data.get("release_year")
+        if isinstance(release_year, int):
+            year = release_year
+        elif release_year:
+            year_str = str(release_year).strip()
+            if year_str.isdigit():
+                year = int(year_str)
 
         # 2. Parse Genres
         genres = []
@@ -76,34 +115,85 @@ class MetadataService:
         params: Dict = None,
         retries: int = 3,
     ) -> Optional[Dict]:
-        """Robust TMDB fetcher."""
+        """
+        Cached TMDB fetcher. Identical concurrent calls share one request,
+        and answers (including 404s) are reused for TMDB_CACHE_TTL seconds.
+        """
+        key = (endpoint, tuple(sorted(params.items())) if params else ())
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                return entry[1]
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._request(session, endpoint, params, retries)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._store(key, t))
+        # Shielded: a cancelled caller must not cancel the request other callers await
+        data, _ = await asyncio.shield(task)
+        return data
+
+    def _store(self, key: tuple, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception():
+            return
+        data, cacheable = task.result()
+        if not cacheable:
+            return
+        self._cache[key] = (time.monotonic() + TMDB_CACHE_TTL, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > TMDB_CACHE_MAX_ITEMS:
+            self._cache.popitem(last=False)
+
+    async def _request(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        params: Optional[Dict],
+        retries: int,
+    ) -> Tuple[Optional[Dict], bool]:
+        """Robust TMDB fetcher. Returns (data, cacheable); failures are not cacheable."""
         url = f"{settings.TMDB_BASE_URL}{endpoint}"
         full_params = {"api_key": settings.TMDB_API_KEY}
         if params:
             full_params.update(params)
 
         logger.debug(f"Fetching TMDB endpoint: {endpoint} with params: {params}")
+        delay = RETRY_BASE_DELAY
         for attempt in range(1, retries + 1):
             try:
-                await asyncio.sleep(self.delay)
+                await self.limiter.acquire()
                 async with session.get(url, params=full_params, timeout=10) as resp:
                     if resp.status == 200:
                         logger.debug(
                             f"Successfully fetched TMDB data for endpoint: {endpoint}"
                         )
-                        return await resp.json()
+                        # Slow down before the budget runs out if TMDB says so
+                        if resp.headers.get("X-RateLimit-Remaining") == "0":
+                            self.limiter.on_throttle()
+                        else:
+                            self.limiter.on_success()
+                        return await resp.json(), True
                     elif resp.status == 429:
-                        retry_after = int(resp.headers.get("Retry-After", 5))
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        if retry_after is None:
+                            retry_after = TMDB_DEFAULT_RETRY_AFTER
                         logger.warning(
                             f"TMDB rate limit hit for endpoint {endpoint}, retrying after {retry_after}s"
                         )
-                        await asyncio.sleep(retry_after)
+                        # The limiter holds back every caller until Retry-After passes
+                        self.limiter.on_throttle(retry_after)
                         continue
                     elif resp.status == 404:
                         logger.debug(
                             f"TMDB endpoint {endpoint} returned 404 (not found)"
                         )
-                        return None
+                        return None, True
                     else:
                         logger.warning(
                             f"TMDB endpoint {endpoint} returned status {resp.status}"
@@ -114,11 +204,22 @@ class MetadataService:
                 )
 
             if attempt < retries:
-                await asyncio.sleep(2**attempt)
+                delay = random.uniform(
+                    RETRY_BASE_DELAY, min(RETRY_MAX_DELAY, delay * 3)
+                )
+                await asyncio.sleep(delay)
         logger.error(
             f"Failed to fetch TMDB data for endpoint {endpoint} after {retries} attempts"
         )
-        return None
+        return None, False
+
+    async def _hedge_cinemeta(
+        self, imdb_id: str, media_type: MediaType, started: asyncio.Event
+    ) -> Optional[Dict[str, Any]]:
+        """Fetches from Cinemeta after CINEMETA_HEDGE_DELAY, setting started once it does."""
+        await asyncio.sleep(CINEMETA_HEDGE_DELAY)
+        started.set()
+        return await self._fetch_cinemeta(imdb_id, media_type)
 
     async def _fetch_cinemeta(
         self, imdb_id: str, media_type: MediaType
@@ -188,45 +289,85 @@ class MetadataService:
             f"Getting details by IMDB ID: {imdb_id}, type: {media_type.value if media_type else None}"
         )
         async with self._get_session() as session:
-            data = await self._fetch(
-                session, f"/find/{imdb_id}", {"external_source": "imdb_id"}
-            )
-
-            result = None
-            resolved_type = media_type
-
-            if data:
-                if data.get("movie_results"):
-                    result = data["movie_results"][0]
-                    resolved_type = MediaType.MOVIE
-                    logger.debug(f"Found movie result for IMDB ID {imdb_id}")
-                elif data.get("tv_results"):
-                    result = data["tv_results"][0]
-                    resolved_type = MediaType.SERIES
-                    logger.debug(f"Found series result for IMDB ID {imdb_id}")
-
-            if result:
-                formatted_result = await self._format_result(
-                    session, result, resolved_type
+            # Hedged lookup: with a known type, Cinemeta is asked too if TMDB is
+            # still busy after CINEMETA_HEDGE_DELAY, so a slow TMDB miss doesn't add
+            # its latency; the hedge is dropped once TMDB delivers
+            cinemeta_task = None
+            hedge_started = asyncio.Event()
+            if media_type:
+                cinemeta_task = asyncio.ensure_future(
+                    self._hedge_cinemeta(imdb_id, media_type, hedge_started)
+                )
+            try:
+                data = await self._fetch(
+                    session, f"/find/{imdb_id}", {"external_source": "imdb_id"}
                 )
-                if formatted_result:
-                    logger.info(
-                        f"Successfully retrieved TMDB details for IMDB ID {imdb_id}: {formatted_result.get('title')}"
-                    )
-                    return formatted_result
 
-            # Fallback to Cinemeta
-            if resolved_type:
-                logger.info(f"TMDB missed {imdb_id}. Falling back to Cinemeta...")
-                cinemeta_result = await self._fetch_cinemeta(imdb_id, resolved_type)
-                if cinemeta_result:
-                    logger.info(
-                        f"Successfully retrieved Cinemeta details for IMDB ID {imdb_id}: {cinemeta_result.get('title')}"
+                result = None
+                resolved_type = media_type
+
+                if data:
+                    if data.get("movie_results"):
+                        result = data["movie_results"][0]
+                        resolved_type = MediaType.MOVIE
+                        logger.debug(f"Found movie result for IMDB ID {imdb_id}")
+                    elif data.get("tv_results"):
+                        result = data["tv_results"][0]
+                        resolved_type = MediaType.SERIES
+                        logger.debug(f"Found series result for IMDB ID {imdb_id}")
+
+                if result:
+                    formatted_result = await self._format_result(
+                        session, result, resolved_type
                     )
-                return cinemeta_result
+                    if formatted_result:
+                        logger.info(
+                            f"Successfully retrieved TMDB details for IMDB ID {imdb_id}: {formatted_result.get('title')}"
+                        )
+                        return formatted_result
+
+                # Fallback to Cinemeta
+                if resolved_type:
+                    logger.info(f"TMDB missed {imdb_id}. Falling back to Cinemeta...")
+                    # Reuse the hedge only if it is already in flight for this type;
+                    # one still waiting out its delay is replaced by a direct request
+                    if (
+                        cinemeta_task is None
+                        or resolved_type != media_type
+                        or not hedge_started.is_set()
+                    ):
+                        if cinemeta_task:
+                            cinemeta_task.cancel()
+                        cinemeta_task = asyncio.ensure_future(
+                            self._fetch_cinemeta(imdb_id, resolved_type)
+                        )
+                    cinemeta_result = await cinemeta_task
+                    if cinemeta_result:
+                        logger.info(
+                            f"Successfully retrieved Cinemeta details for IMDB ID {imdb_id}: {cinemeta_result.get('title')}"
+                        )
+                    return cinemeta_result
 
-            logger.warning(f"No metadata found for IMDB ID: {imdb_id}")
-            return None
+                logger.warning(f"No metadata found for IMDB ID: {imdb_id}")
+                return None
+            finally:
+                if cinemeta_task and not cinemeta_task.done():
+                    cinemeta_task.cancel()
+
+    async def get_details_by_imdb_many(
+        self, imdb_ids: List[str], media_type: Optional[MediaType] = None
+    ) -> Dict[str, Any]:
+        """
+        Resolves several IMDB IDs concurrently, each unique ID once.
+        Returns {imdb_id: result}; a lookup that raised maps to its exception.
+        """
+        unique_ids = list(dict.fromkeys(imdb_ids))
+        logger.debug(f"Getting details for {len(unique_ids)} IMDB IDs")
+        results = await asyncio.gather(
+            *(self.get_details_by_imdb(imdb_id, media_type) for imdb_id in unique_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(unique_ids, results))
 
     async def search_by_query(
         self, title: str, year: int, media_type: MediaType
@@ -329,3 +470,40 @@ class MetadataService:
         }
         logger.debug(f"Formatted metadata result: {title} ({year})")
         return result
+
+
+# --- Shared Instance ---
+# Request handlers share one service and one pooled HTTP session, so repeated syncs
+# reuse keep-alive connections instead of paying a new TCP/TLS handshake each time.
+
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_service: Optional[MetadataService] = None
+
+
+def _get_shared_session() -> aiohttp.ClientSession:
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        logger.debug("Creating shared metadata HTTP session")
+        _shared_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20)
+        )
+    return _shared_session
+
+
+async def get_metadata_service() -> MetadataService:
+    """FastAPI dependency returning the shared MetadataService."""
+    global _shared_service
+    session = _get_shared_session()
+    if _shared_service is None or _shared_service.external_session is not session:
+        _shared_service = MetadataService(session=session)
+    return _shared_service
+
+
+async def close_metadata_service():
+    """Closes the shared HTTP session. Called on application shutdown."""
+    global _shared_session, _shared_service
+    if _shared_session and not _shared_session.closed:
+        await _shared_session.close()
+        logger.debug("Shared metadata HTTP session closed")
+    _shared_session = None
+    _shared_service = None
@@ -1,19 +1,178 @@
-from fastapi import APIRouter, Request, Depends, Query, Form, HTTPException
+from fastapi import APIRouter, Request, Depends, Query, HTTPException
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from sqlalchemy import delete, update
+from starlette.datastructures import FormData
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+import asyncio
+import gzip
 import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.http import REVALIDATE_CACHE_CONTROL, make_etag, not_modified_response
 from app.db.database import get_db
 from app.db.models import MediaItem, MediaStatus, MediaType
-from app.services.metadata import MetadataService
-from app.services.db import get_filtered_items  # Import shared logic
-from app.services.db import get_filtered_items, get_library_stats
+from app.services.metadata import MetadataService, get_metadata_service
+from app.services.db import (  # Shared logic
+    decode_cursor,
+    encode_cursor,
+    get_filtered_items,
+    get_library_stats,
+    get_library_version,
+)
+from app.api.stremio import invalidate_catalog_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
+# Templates only change on deploy, so skip Jinja's per-render source stat
+# unless DEBUG is on, and parse every page once at import.
+templates.env.auto_reload = settings.DEBUG
+templates.env.cache = {}  # Unbounded; there are only a handful of templates
+_TEMPLATES = {
+    name: templates.get_template(name)
+    for name in (
+        "dashboard.html",
+        "partials/media_grid.html",
+        "partials/detail_modal.html",
+        "partials/edit_form.html",
+    )
+}
+
+
+def _get_template(name: str):
+    # In DEBUG, go through the loader so edited templates are picked up
+    return templates.get_template(name) if settings.DEBUG else _TEMPLATES[name]
+
+
+def _render(name: str, context: dict) -> HTMLResponse:
+    """Renders a preloaded template straight into an HTMLResponse."""
+    return HTMLResponse(_get_template(name).render(context))
+
+
+def _optional_str(value: Optional[str]) -> Optional[str]:
+    """Stripped form value, or None when it is missing or blank."""
+    return (value.strip() or None) if value else None
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    """Form value as an int, or None when it is missing or blank. Raises ValueError."""
+    value = _optional_str(value)
+    return int(value) if value else None
+
+
+# Form value -> enum member
+MEDIA_TYPES = {m.value: m for m in MediaType}
+MEDIA_STATUSES = {s.value: s for s in MediaStatus}
+
+
+def _parse_edit_form(form: FormData) -> dict:
+    """
+    Validates the edit form into column values in one pass, without a pydantic
+    model per field. Raises KeyError/ValueError on missing or invalid fields.
+    """
+    title = form.get("title")
+    if not title:
+        raise KeyError("title")
+    media_type = MEDIA_TYPES.get(form.get("media_type"))
+    status = MEDIA_STATUSES.get(form.get("status"))
+    if media_type is None or status is None:
+        raise ValueError(
+            f"invalid media_type={form.get('media_type')!r} or status={form.get('status')!r}"
+        )
+    return {
+        "title": title,
+        "year": int(form["year"]),
+        "media_type": media_type.value,
+        "status": status.value,
+        "tmdb_id": _optional_int(form.get("tmdb_id")),
+        "imdb_id": _optional_str(form.get("imdb_id")),
+        "poster_url": form.get("poster_url") or None,
+        "backdrop_url": form.get("backdrop_url") or None,
+        "overview": form.get("overview") or None,
+    }
+
+
+# Columns the grid tiles (and the next-page cursor) need; rows come back as
+# mappings, so no MediaItem instances are built for a page
+GRID_COLUMNS = (
+    MediaItem.id,
+    MediaItem.title,
+    MediaItem.year,
+    MediaItem.poster_url,
+    MediaItem.status,
+    MediaItem.streaming_date,
+    MediaItem.created_at,
+)
+
+# --- Grid Cache ---
+# The grid partial is the same for everyone until the library changes, so
+# rendered pages are kept per query. The library version is part of the key,
+# so any invalidate_catalog_cache() call retires every cached page at once.
+GRID_CACHE_TTL = 30  # seconds
+GRID_CACHE_MAX_ITEMS = 512
+# Pages at least this big are also kept gzipped, so cache hits skip compression.
+# Matches the GZipMiddleware threshold in app.main.
+GRID_GZIP_MIN_SIZE = 1024
+
+# Entries are (expires_at, html, gzipped html or None)
+_grid_cache: "OrderedDict[Tuple, Tuple[float, bytes, Optional[bytes]]]" = OrderedDict()
+
+
+def _grid_cache_get(key: Tuple) -> Optional[Tuple[bytes, Optional[bytes]]]:
+    entry = _grid_cache.get(key)
+    if entry is None:
+        return None
+    expires, html, gzipped = entry
+    if expires < time.monotonic():
+        del _grid_cache[key]
+        return None
+    _grid_cache.move_to_end(key)
+    return html, gzipped
+
+
+def _grid_cache_set(key: Tuple, html: bytes):
+    gzipped = (
+        gzip.compress(html, compresslevel=5)
+        if len(html) >= GRID_GZIP_MIN_SIZE
+        else None
+    )
+    _grid_cache[key] = (time.monotonic() + GRID_CACHE_TTL, html, gzipped)
+    _grid_cache.move_to_end(key)
+    while len(_grid_cache) > GRID_CACHE_MAX_ITEMS:
+        _grid_cache.popitem(last=False)
+
+
+# Rendered grid fragments are flushed in chunks of about this many characters,
+# so the first tiles go out while the rest are still rendering
+GRID_STREAM_CHUNK_SIZE = 16 * 1024
+
+
+async def _stream_grid(context: dict, cache_key: Tuple):
+    """Streams the grid partial and caches the full page once it completes."""
+    parts = []
+    buffer = []
+    size = 0
+    for fragment in _get_template("partials/media_grid.html").generate(context):
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= GRID_STREAM_CHUNK_SIZE:
+            chunk = "".join(buffer).encode()
+            parts.append(chunk)
+            yield chunk
+            buffer.clear()
+            size = 0
+    if buffer:
+        chunk = "".join(buffer).encode()
+        parts.append(chunk)
+        yield chunk
+    # Only reached if the client took the whole page
+    _grid_cache_set(cache_key, b"".join(parts))
+
+
 # --- HTML Page Endpoints ---
 
 
@@ -27,7 +186,7 @@ async def dashboard(
     # Fetch stats
     stats = await get_library_stats(db)
 
-    return templates.TemplateResponse(
+    return _render(
         "dashboard.html",
         {
             "request": request,
@@ -47,38 +206,71 @@ async def get_items_html(
     q: str = Query(""),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
     """Returns the HTML partial for the media grid with filtering and search."""
 
+    cache_key = (get_library_version(), status, media_type, q, cursor, offset, limit)
+    cached = _grid_cache_get(cache_key)
+    if cached is not None:
+        logger.debug("Dashboard: Grid served from cache (cursor=%s)", cursor)
+        html, gzipped = cached
+        # A preset Content-Encoding makes GZipMiddleware pass the body through
+        if gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            return HTMLResponse(
+                gzipped, headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+            )
+        return HTMLResponse(html)
+
+    # "Load More" pages by cursor (a range read on the sort index);
+    # 'offset' is still honoured for old links and maps to 'skip' in logic
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        logger.warning("Dashboard: Rejecting invalid cursor %r", cursor)
+        return HTMLResponse("Invalid cursor", status_code=400)
+
     # Delegate to shared service
-    # Note: 'offset' in HTMX is mapped to 'skip' in logic
-    items, total = await get_filtered_items(
+    items, _, has_more = await get_filtered_items(
         db=db,
         skip=offset,
         limit=limit,
-        status=status,
-        media_type=media_type,
+        status=[status],
+        media_type=[media_type],
         q=q,
+        cursor=after,
+        # The grid only needs has_more (from the limit + 1 fetch), never the count
+        include_total=False,
+        columns=GRID_COLUMNS,
         # We can also pass genres/platforms here later if we add UI filters for them
     )
 
     logger.info(
-        f"Dashboard: Returning {len(items)} items for HTML grid (offset={offset}, limit={limit})"
+        "Dashboard: Returning %s items for HTML grid (cursor=%s, offset=%s, limit=%s)",
+        len(items),
+        cursor,
+        offset,
+        limit,
     )
 
-    next_offset = offset + limit if len(items) == limit else None
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            last["streaming_date"], last["created_at"], last["id"]
+        )
 
-    return templates.TemplateResponse(
-        "partials/media_grid.html",
-        {
-            "request": request,
-            "items": items,
-            "next_offset": next_offset,
-            "current_status": status,
-            "current_type": media_type,
-            "current_q": q,
-        },
+    context = {
+        "request": request,
+        "items": items,
+        "next_cursor": next_cursor,
+        "current_status": status,
+        "current_type": media_type,
+        "current_q": q,
+    }
+    return StreamingResponse(
+        _stream_grid(context, cache_key), media_type="text/html; charset=utf-8"
     )
 
 
@@ -87,19 +279,27 @@ async def get_item_detail(
     item_id: int, request: Request, db: AsyncSession = Depends(get_db)
 ):
     """Returns the item detail view."""
-    logger.debug(f"Fetching item detail HTML for ID: {item_id}")
-    result = await db.execute(select(MediaItem).where(MediaItem.id == item_id))
-    item = result.scalar_one_or_none()
+    logger.debug("Fetching item detail HTML for ID: %s", item_id)
+    item = await db.get(MediaItem, item_id)
 
     if not item:
-        logger.warning(f"Item detail not found for ID: {item_id}")
+        logger.warning("Item detail not found for ID: %s", item_id)
         return HTMLResponse("Item not found", status_code=404)
 
-    logger.info(f"Rendering detail view for item: {item.title} (ID: {item_id})")
-    return templates.TemplateResponse(
+    # The detail only changes when the row does, so reopening a card can skip rendering
+    etag = make_etag("detail", item.id, item.created_at, item.updated_at)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+
+    logger.info("Rendering detail view for item: %s (ID: %s)", item.title, item_id)
+    response = _render(
         "partials/detail_modal.html",
         {"request": request, "item": item},
     )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return response
 
 
 # --- EDIT / DELETE / SMART SYNC Endpoints ---
@@ -110,54 +310,80 @@ async def get_edit_form(
     item_id: int, request: Request, db: AsyncSession = Depends(get_db)
 ):
     """Returns the Edit Form partial pre-filled with DB data."""
-    logger.debug(f"Fetching edit form HTML for item ID: {item_id}")
-    result = await db.execute(select(MediaItem).where(MediaItem.id == item_id))
-    item = result.scalar_one_or_none()
+    logger.debug("Fetching edit form HTML for item ID: %s", item_id)
+    item = await db.get(MediaItem, item_id)
     if not item:
-        logger.warning(f"Edit form not found for item ID: {item_id}")
+        logger.warning("Edit form not found for item ID: %s", item_id)
         return HTMLResponse("Not found")
-    logger.info(f"Rendering edit form for item: {item.title} (ID: {item_id})")
-    return templates.TemplateResponse(
-        "partials/edit_form.html", {"request": request, "item": item}
-    )
+    logger.info("Rendering edit form for item: %s (ID: %s)", item.title, item_id)
+    return _render("partials/edit_form.html", {"request": request, "item": item})
 
 
 @router.post("/dashboard/item/{item_id}/sync", response_class=HTMLResponse)
 async def sync_item_metadata(
     item_id: int,
     request: Request,
-    id_type: str = Form(...),
-    tmdb_id: str = Form(None),
-    imdb_id: str = Form(None),
-    media_type: str = Form(...),
     db: AsyncSession = Depends(get_db),
+    meta_service: MetadataService = Depends(get_metadata_service),
 ):
     """Fetches fresh metadata and returns updated form without saving."""
+    form = await request.form()
+    id_type = form.get("id_type")
+    tmdb_id = form.get("tmdb_id")
+    imdb_id = form.get("imdb_id")
+    media_type = form.get("media_type")
     logger.debug(
-        f"Syncing metadata for item {item_id} via web interface: id_type={id_type}, tmdb_id={tmdb_id}, imdb_id={imdb_id}, media_type={media_type}"
+        "Syncing metadata for item %s via web interface: id_type=%s, tmdb_id=%s, imdb_id=%s, media_type=%s",
+        item_id,
+        id_type,
+        tmdb_id,
+        imdb_id,
+        media_type,
     )
-    meta_service = MetadataService()
     # Ensure media_type string is valid if using Enum
-    m_type = (
-        MediaType(media_type) if media_type in [m.value for m in MediaType] else None
-    )
+    m_type = MEDIA_TYPES.get(media_type)
 
-    result = await db.execute(select(MediaItem).where(MediaItem.id == item_id))
-    item = result.scalar_one_or_none()
-    if not item:
-        logger.warning(f"Cannot sync metadata for item {item_id}: not found")
-        return HTMLResponse("Item not found")
-
-    match_data = None
+    # The lookup only needs the form's ids, so it runs while the item loads
+    lookup = None
     try:
+        imdb_id = _optional_str(imdb_id)
+        tmdb_id = _optional_int(tmdb_id)
         if id_type == "imdb" and imdb_id:
-            logger.debug(f"Fetching metadata by IMDB ID: {imdb_id}")
-            match_data = await meta_service.get_details_by_imdb(imdb_id.strip(), m_type)
-        elif id_type == "tmdb" and tmdb_id:
-            logger.debug(f"Fetching metadata by TMDB ID: {tmdb_id}")
-            match_data = await meta_service.get_details_by_tmdb_id(int(tmdb_id), m_type)
+            logger.debug("Fetching metadata by IMDB ID: %s", imdb_id)
+            lookup = asyncio.ensure_future(
+                meta_service.get_details_by_imdb(imdb_id, m_type)
+            )
+        elif id_type == "tmdb" and tmdb_id is not None:
+            logger.debug("Fetching metadata by TMDB ID: %s", tmdb_id)
+            lookup = asyncio.ensure_future(
+                meta_service.get_details_by_tmdb_id(tmdb_id, m_type)
+            )
     except (ValueError, TypeError) as e:
-        logger.warning(f"Sync ID conversion error for item {item_id}: {e}")
+        logger.warning("Sync ID conversion error for item %s: %s", item_id, e)
+
+    try:
+        item = await db.get(MediaItem, item_id)
+        # Nothing is saved here, so hand the pooled connection back instead of
+        # holding it while TMDB/Cinemeta answer (the loaded item stays usable)
+        await db.close()
+        if not item:
+            logger.warning("Cannot sync metadata for item %s: not found", item_id)
+            return HTMLResponse("Item not found")
+
+        match_data = None
+        if lookup is not None:
+            try:
+                match_data = await lookup
+            except (ValueError, TypeError) as e:
+                logger.warning("Sync lookup error for item %s: %s", item_id, e)
+    finally:
+        # Never leave the lookup behind: cancel it if it is still running (missing
+        # item, failed load), or retrieve its outcome so an error isn't left unread
+        if lookup is not None:
+            if not lookup.done():
+                lookup.cancel()
+            elif not lookup.cancelled():
+                lookup.exception()
 
     if match_data:
         item.tmdb_id = match_data.get("tmdb_id")
@@ -170,63 +396,53 @@ async def sync_item_metadata(
         if m_type:
             item.media_type = m_type.value
         logger.info(
-            f"Successfully synced metadata for item: {item.title} (ID: {item_id})"
+            "Successfully synced metadata for item: %s (ID: %s)", item.title, item_id
         )
     else:
-        logger.warning(f"No metadata match found for item {item_id}")
+        logger.warning("No metadata match found for item %s", item_id)
 
-    return templates.TemplateResponse(
-        "partials/edit_form.html", {"request": request, "item": item}
-    )
+    return _render("partials/edit_form.html", {"request": request, "item": item})
 
 
 @router.post("/dashboard/item/{item_id}", response_class=HTMLResponse)
 async def update_item(
     item_id: int,
     request: Request,
-    title: str = Form(...),
-    year: int = Form(...),
-    tmdb_id: str = Form(None),
-    imdb_id: str = Form(None),
-    media_type: str = Form(...),
-    status: str = Form(...),
-    poster_url: str = Form(None),
-    backdrop_url: str = Form(None),
-    overview: str = Form(None),
     db: AsyncSession = Depends(get_db),
 ):
     """Saves edited details."""
-    logger.debug(f"Updating item {item_id} via web interface with title: {title}")
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
+    try:
+        values = _parse_edit_form(await request.form())
+    except (KeyError, ValueError) as e:
+        logger.warning("Cannot update item %s: invalid form data (%s)", item_id, e)
+        return HTMLResponse("Error: Invalid form data", status_code=400)
+    logger.debug(
+        "Updating item %s via web interface with title: %s", item_id, values["title"]
+    )
+
+    # Single round-trip: UPDATE ... RETURNING the fresh row, which is rendered as-is
+    stmt = (
+        update(MediaItem)
+        .where(MediaItem.id == item_id)
+        .values(**values)
+        .returning(MediaItem)
+    )
     result = await db.execute(stmt)
     item = result.scalar_one_or_none()
 
     if not item:
-        logger.warning(f"Cannot update item {item_id}: not found")
+        logger.warning("Cannot update item %s: not found", item_id)
         return HTMLResponse("Error: Item not found")
 
-    # Update Fields
-    item.title = title
-    item.year = year
-    item.media_type = media_type
-    item.status = status
-    item.tmdb_id = int(tmdb_id) if tmdb_id and tmdb_id.strip() else None
-    item.imdb_id = imdb_id.strip() if imdb_id else None
-    item.poster_url = poster_url
-    item.backdrop_url = backdrop_url
-    item.overview = overview
-
     await db.commit()
-
-    # Force refresh the item object to ensure we display the latest state
-    await db.refresh(item)
+    invalidate_catalog_cache()
 
     logger.info(
-        f"Successfully updated item via web interface: {item.title} (ID: {item_id})"
+        "Successfully updated item via web interface: %s (ID: %s)", item.title, item_id
     )
 
     # Return the detail modal HTML
-    response = templates.TemplateResponse(
+    response = _render(
         "partials/detail_modal.html",
         {"request": request, "item": item},
     )
@@ -239,19 +455,33 @@ async def update_item(
 
 @router.delete("/dashboard/item/{item_id}", response_class=HTMLResponse)
 async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
-    """Deletes item and triggers a grid refresh."""
-    logger.debug(f"Deleting item {item_id} via web interface")
-    stmt = select(MediaItem).where(MediaItem.id == item_id)
+    """Deletes item, closes the modal and removes its tile from the grid."""
+    logger.debug("Deleting item %s via web interface", item_id)
+    stmt = (
+        delete(MediaItem)
+        .where(MediaItem.id == item_id)
+        .returning(MediaItem.id, MediaItem.title)
+    )
     result = await db.execute(stmt)
-    item = result.scalar_one_or_none()
-    if item:
-        await db.delete(item)
+    deleted = result.one_or_none()
+    if deleted:
         await db.commit()
+        invalidate_catalog_cache()
         logger.info(
-            f"Successfully deleted item via web interface: {item.title} (ID: {item_id})"
+            "Successfully deleted item via web interface: %s (ID: %s)",
+            deleted.title,
+            item_id,
         )
     else:
-        logger.warning(f"Cannot delete item {item_id}: not found")
-
-    # Return empty content with trigger to close modal and refresh grid
-    return Response(content="", headers={"HX-Trigger": "refreshGrid, closeModal"})
+        logger.warning("Cannot delete item %s: not found", item_id)
+
+    # Empty body swapped over the deleted tile removes it in place,
+    # instead of triggering a full grid re-fetch
+    return Response(
+        content="",
+        headers={
+            "HX-Trigger": "closeModal",
+            "HX-Retarget": f"#item-{item_id}",
+            "HX-Reswap": "outerHTML swap:200ms",
+        },
+    )
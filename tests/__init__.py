@@ -0,0 +1,6 @@
+import os
+
+# Settings are read when app modules are imported, so point them at a throwaway
+# in-memory SQLite database before any test module imports the app.
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("TMDB_API_KEY", "test")
@@ -0,0 +1,43 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import MediaItem
+from app.main import app
+
+
+async def seed():
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(MediaItem))
+        db.add(MediaItem(title="Heat", media_type="movie", status="approved"))
+        await db.commit()
+
+
+class ConditionalRequestTests(unittest.TestCase):
+    # The with-block runs the lifespan (schema setup); its ingestion loop is
+    # cancelled on exit, long before the first scan is due
+
+    def test_unchanged_list_returns_304(self):
+        with TestClient(app) as client:
+            client.portal.call(seed)
+            first = client.get("/api/items")
+            self.assertEqual(first.status_code, 200)
+            etag = first.headers["ETag"]
+
+            again = client.get("/api/items", headers={"If-None-Match": etag})
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(again.headers["ETag"], etag)
+
+    def test_write_changes_etag(self):
+        with TestClient(app) as client:
+            client.portal.call(seed)
+            etag = client.get("/api/items").headers["ETag"]
+            item_id = client.get("/api/items").json()["data"][0]["id"]
+            client.post(f"/api/items/{item_id}", json={"title": "Heat (1995)"})
+
+            after = client.get("/api/items", headers={"If-None-Match": etag})
+            self.assertEqual(after.status_code, 200)
+            self.assertNotEqual(after.headers["ETag"], etag)
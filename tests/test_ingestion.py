@@ -0,0 +1,65 @@
+import unittest
+
+from sqlalchemy import delete, update
+
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import MediaType, ScrapedItem, ScrapeStatus
+from app.services.ingestion import IngestionService
+
+
+def scraped(i, imdb_id=None):
+    return {
+        "binged_url": f"https://www.binged.com/streaming/{i}",
+        "title": f"Title {i}",
+        "year": "2024",
+        "platform": "Netflix",
+        "binged_imdb_id": imdb_id,
+        "languages": "Hindi",
+        "raw_data": {"id": i},
+    }
+
+
+class SaveRawBatchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await init_db()
+        self.db = AsyncSessionLocal()
+        await self.db.execute(delete(ScrapedItem))
+        await self.db.commit()
+        self.service = IngestionService(self.db)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+
+    async def save(self, items):
+        return await self.service._save_raw_batch(items, MediaType.MOVIE)
+
+    async def test_counts_inserted_rows(self):
+        self.assertEqual(await self.save([scraped(1), scraped(2)]), 2)
+
+    async def test_duplicate_urls_count_once(self):
+        self.assertEqual(await self.save([scraped(1), scraped(1)]), 1)
+
+    async def test_unchanged_rescrape_counts_nothing(self):
+        await self.save([scraped(1), scraped(2)])
+        self.assertEqual(await self.save([scraped(1), scraped(2)]), 0)
+
+    async def test_counts_only_changed_rows(self):
+        await self.save([scraped(1), scraped(2), scraped(3)])
+        await self.db.execute(
+            update(ScrapedItem)
+            .where(ScrapedItem.source_url == scraped(3)["binged_url"])
+            .values(scrape_status=ScrapeStatus.PROCESSED.value)
+        )
+        await self.db.commit()
+        # 2 gains an IMDB id, 3 goes back to pending, 4 is new
+        items = [scraped(1), scraped(2, "tt0000002"), scraped(3), scraped(4)]
+        self.assertEqual(await self.save(items), 3)
+
+    async def test_raw_data_is_not_mutated(self):
+        item = scraped(1)
+        await self.save([item])
+        self.assertEqual(item["raw_data"], {"id": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
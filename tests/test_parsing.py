@@ -0,0 +1,56 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from app.core.ratelimit import parse_retry_after
+from app.scrapers.binged import _parse_date
+from app.services.db import decode_cursor, encode_cursor
+
+
+class CursorTests(unittest.TestCase):
+    def test_round_trip(self):
+        key = (date(2024, 1, 5), datetime(2024, 1, 6, 12, 30, 15), 42)
+        self.assertEqual(decode_cursor(encode_cursor(*key)), key)
+
+    def test_round_trip_without_dates(self):
+        self.assertEqual(decode_cursor(encode_cursor(None, None, 7)), (None, None, 7))
+
+    def test_rejects_garbage(self):
+        for cursor in ["", "not-a-cursor", "W10"]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class RetryAfterTests(unittest.TestCase):
+    def test_missing(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after(""))
+
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after(" 3 "), 3.0)
+
+    def test_http_date(self):
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(
+            parse_retry_after(format_datetime(when, usegmt=True)), 30, delta=2
+        )
+
+    def test_past_http_date_is_zero(self):
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_garbage(self):
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class BingedDateTests(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(_parse_date("05 Jan 2024"), date(2024, 1, 5))
+        self.assertEqual(_parse_date("2024-02-03"), date(2024, 2, 3))
+
+    def test_invalid(self):
+        for value in ["", "bad", "31 Feb 2024", "05 Foo 2024"]:
+            self.assertIsNone(_parse_date(value))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from sqlalchemy import delete
+
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import MediaItem
+from app.services.db import get_filtered_items
+
+
+class TitleSearchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(MediaItem))
+            for title in ["Manhattan", "Batman", "Superman Returns", "Iron Man"]:
+                db.add(MediaItem(title=title, media_type="movie", status="new"))
+            await db.commit()
+
+    async def search(self, q):
+        async with AsyncSessionLocal() as db:
+            items, _, _ = await get_filtered_items(db, 0, 50, q=q)
+            return sorted(item.title for item in items)
+
+    async def test_substring_matches_inside_words(self):
+        # A word-prefix hit ("Manhattan") must not hide substring hits ("Batman")
+        self.assertEqual(
+            await self.search("man"),
+            ["Batman", "Iron Man", "Manhattan", "Superman Returns"],
+        )
+
+    async def test_search_ignores_case(self):
+        self.assertEqual(await self.search("MAN"), await self.search("man"))
+
+    async def test_term_spanning_words(self):
+        self.assertEqual(await self.search("n ma"), ["Iron Man"])
+
+    async def test_short_term(self):
+        self.assertEqual(
+            await self.search("ma"),
+            ["Batman", "Iron Man", "Manhattan", "Superman Returns"],
+        )
+
+    async def test_no_match(self):
+        self.assertEqual(await self.search("zzz"), [])
+
+    async def test_index_follows_title_updates(self):
+        async with AsyncSessionLocal() as db:
+            items, _, _ = await get_filtered_items(db, 0, 50, q="Batman")
+            items[0].title = "Robin"
+            await db.commit()
+        self.assertEqual(await self.search("bat"), [])
+        self.assertEqual(await self.search("robin"), ["Robin"])
+
+
+class GenreFilterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(MediaItem))
+            for title, genres in [
+                ("Alien", ["Horror", "Science Fiction"]),
+                ("Heat", ["Action", "Crime"]),
+            ]:
+                db.add(
+                    MediaItem(
+                        title=title, media_type="movie", status="new", genres=genres
+                    )
+                )
+            await db.commit()
+
+    async def filter(self, genres):
+        async with AsyncSessionLocal() as db:
+            items, _, _ = await get_filtered_items(db, 0, 50, genres=genres)
+            return sorted(item.title for item in items)
+
+    async def test_genres_ignore_case(self):
+        self.assertEqual(await self.filter(["action"]), ["Heat"])
+        self.assertEqual(await self.filter(["SCIENCE FICTION"]), ["Alien"])
+
+    async def test_all_genres_must_match(self):
+        self.assertEqual(await self.filter(["horror", "Science Fiction"]), ["Alien"])
+        self.assertEqual(await self.filter(["horror", "crime"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()